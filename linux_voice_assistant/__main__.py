@@ -6,12 +6,14 @@ import logging
 import sys
 import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from queue import Queue
-from typing import Dict, List, Optional, Set, Union
+from typing import Dict, List, Optional, Set, Tuple, Union
 
 import numpy as np
 import soundcard as sc
+from google.protobuf.internal import api_implementation
 from pymicro_wakeword import MicroWakeWord, MicroWakeWordFeatures
 from pyopen_wakeword import OpenWakeWord, OpenWakeWordFeatures
 
@@ -172,6 +174,14 @@ async def main() -> None:
     logging.basicConfig(level=logging.DEBUG if args.debug else logging.INFO)
     _LOGGER.debug(args)
 
+    protobuf_implementation = api_implementation.Type()
+    _LOGGER.debug("Protobuf implementation: %s", protobuf_implementation)
+    if protobuf_implementation == "python":
+        _LOGGER.warning(
+            "Using the pure-Python protobuf implementation; "
+            "message handling will be slower"
+        )
+
     args.download_dir = Path(args.download_dir)
     args.download_dir.mkdir(parents=True, exist_ok=True)
 
@@ -310,12 +320,7 @@ async def main() -> None:
         global_preferences_path.parent.mkdir(parents=True, exist_ok=True)
         with open(global_preferences_path, "w", encoding="utf-8") as global_file:
             json.dump(
-                {
-                    "wake_word_friendly_names": global_preferences.wake_word_friendly_names,
-                    "ha_base_url": global_preferences.ha_base_url,
-                    "ha_token": global_preferences.ha_token,
-                    "ha_history_entity": global_preferences.ha_history_entity,
-                },
+                global_preferences.to_dict(),
                 global_file,
                 ensure_ascii=False,
                 indent=4,
@@ -393,6 +398,9 @@ async def main() -> None:
         global_preferences_path=global_preferences_path,
         refractory_seconds=args.refractory_seconds,
         download_dir=args.download_dir,
+        io_executor=ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix=f"{args.name}_io"
+        ),
         screen_management=args.screen_management,
         disable_wakeword_during_tts=args.disable_wakeword_during_tts,
         software_mute=False,
@@ -438,6 +446,9 @@ async def main() -> None:
         state.audio_queue.put_nowait(None)
         process_audio_thread.join()
 
+        # Let queued log writes and history syncs finish
+        state.io_executor.shutdown(wait=True)
+
     _LOGGER.debug("Server stopped")
 
 
@@ -457,6 +468,7 @@ def process_audio(state: ServerState, mic, block_size: int):
 
     last_active: Optional[float] = None
     last_mute_poll: float = 0.0
+    last_mute_stat: Optional[Tuple[int, int]] = None
 
     try:
         _LOGGER.debug("Opening audio input device: %s", mic.name)
@@ -477,7 +489,20 @@ def process_audio(state: ServerState, mic, block_size: int):
                 if now - last_mute_poll > 1.0:
                     last_mute_poll = now
                     try:
-                        if state.shared_mute_path.exists():
+                        # Only re-read the flag when the file has changed
+                        try:
+                            mute_stat = state.shared_mute_path.stat()
+                            current_mute_stat: Optional[Tuple[int, int]] = (
+                                mute_stat.st_mtime_ns,
+                                mute_stat.st_size,
+                            )
+                        except FileNotFoundError:
+                            current_mute_stat = None
+
+                        if (current_mute_stat is not None) and (
+                            current_mute_stat != last_mute_stat
+                        ):
+                            last_mute_stat = current_mute_stat
                             txt = state.shared_mute_path.read_text(encoding="utf-8").strip().lower()
                             desired = txt.startswith("on") or txt.startswith("true")
                             if desired != state.software_mute:
@@ -592,4 +617,10 @@ def process_audio(state: ServerState, mic, block_size: int):
 # -----------------------------------------------------------------------------
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    try:
+        import uvloop
+    except ImportError:
+        # Optional: faster event loop
+        asyncio.run(main())
+    else:
+        uvloop.run(main())
@@ -2,9 +2,10 @@
 
 import asyncio
 import logging
+import threading
 from abc import abstractmethod
 from collections.abc import Iterable
-from typing import TYPE_CHECKING, List, Optional
+from typing import TYPE_CHECKING, List, Optional, Tuple, Union
 
 # pylint: disable=no-name-in-module
 from aioesphomeapi._frame_helper.packets import make_plain_text_packets
@@ -23,9 +24,18 @@ from google.protobuf import message
 
 PROTO_TO_MESSAGE_TYPE = {v: k for k, v in MESSAGE_TYPE_TO_PROTO.items()}
 
+# (message type, serialized payload) that can be sent without re-encoding
+EncodedMessage = Tuple[int, bytes]
+OutgoingMessage = Union[message.Message, EncodedMessage]
+
 _LOGGER = logging.getLogger(__name__)
 
 
+def encode_message(msg: message.Message) -> EncodedMessage:
+    """Serialize a message once so it can be sent many times."""
+    return (PROTO_TO_MESSAGE_TYPE[msg.__class__], msg.SerializeToString())
+
+
 class APIServer(asyncio.Protocol):
 
     def __init__(self, name: str) -> None:
@@ -36,9 +46,16 @@ class APIServer(asyncio.Protocol):
         self._pos: int = 0
         self._transport = None
         self._writelines = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread_id: Optional[int] = None
+
+        # Frames waiting to be written on the next loop iteration
+        self._pending: List[EncodedMessage] = []
+        self._pending_lock = threading.Lock()
+        self._flush_scheduled = False
 
     @abstractmethod
-    def handle_message(self, msg: message.Message) -> Iterable[message.Message]:
+    def handle_message(self, msg: message.Message) -> Iterable[OutgoingMessage]:
         pass
 
     def process_packet(self, msg_type: int, packet_data: bytes) -> None:
@@ -62,6 +79,7 @@ class APIServer(asyncio.Protocol):
         elif isinstance(msg_inst, DisconnectRequest):
             self.send_messages([DisconnectResponse()])
             _LOGGER.debug("Disconnect requested")
+            self._flush_pending()
             if self._transport:
                 self._transport.close()
                 self._transport = None
@@ -74,20 +92,61 @@ class APIServer(asyncio.Protocol):
 
             self.send_messages(msgs)
 
-    def send_messages(self, msgs: List[message.Message]):
+    def send_messages(self, msgs: Iterable[OutgoingMessage]):
         if self._writelines is None:
             return
 
         packets = [
-            (PROTO_TO_MESSAGE_TYPE[msg.__class__], msg.SerializeToString())
+            (
+                msg
+                if isinstance(msg, tuple)
+                else (PROTO_TO_MESSAGE_TYPE[msg.__class__], msg.SerializeToString())
+            )
             for msg in msgs
         ]
-        packet_bytes = make_plain_text_packets(packets)
-        self._writelines(packet_bytes)
+        if not packets:
+            # Handlers often produce no response
+            return
+
+        self._queue_packets(packets)
+
+    def send_encoded(self, packet: EncodedMessage) -> None:
+        """Send one already encoded message (e.g. an audio chunk)."""
+        if self._writelines is None:
+            return
+
+        self._queue_packets((packet,))
+
+    def _queue_packets(self, packets: Iterable[EncodedMessage]) -> None:
+        # Sends from one loop iteration (or other threads) share one write
+        with self._pending_lock:
+            self._pending.extend(packets)
+            if self._flush_scheduled:
+                return
+
+            self._flush_scheduled = True
+
+        assert self._loop is not None
+        if threading.get_ident() == self._loop_thread_id:
+            self._loop.call_soon(self._flush_pending)
+        else:
+            # Player/audio callbacks must wake the loop up
+            self._loop.call_soon_threadsafe(self._flush_pending)
+
+    def _flush_pending(self) -> None:
+        with self._pending_lock:
+            packets = self._pending
+            self._pending = []
+            self._flush_scheduled = False
+
+        if packets and (self._writelines is not None):
+            self._writelines(make_plain_text_packets(packets))
 
     def connection_made(self, transport) -> None:
         self._transport = transport
         self._writelines = transport.writelines
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread_id = threading.get_ident()
 
     def data_received(self, data: bytes):
         if self._buffer is None:
@@ -1,6 +1,6 @@
-from abc import abstractmethod
+import logging
 from collections.abc import Iterable
-from typing import Callable, List, Optional, Union
+from typing import Callable, Dict, List, Optional, Union
 
 # pylint: disable=no-name-in-module
 from aioesphomeapi.api_pb2 import (  # type: ignore[attr-defined]
@@ -20,24 +20,59 @@ from aioesphomeapi.api_pb2 import (  # type: ignore[attr-defined]
 from aioesphomeapi.model import MediaPlayerCommand, MediaPlayerState
 from google.protobuf import message
 
-from .api_server import APIServer
+from .api_server import APIServer, EncodedMessage, OutgoingMessage, encode_message
 from .mpv_player import MpvMediaPlayer
 from .util import call_all
 
+_LOGGER = logging.getLogger(__name__)
+
+# Plain ints so command checks are int comparisons against the protobuf field
+_COMMAND_PAUSE = int(MediaPlayerCommand.PAUSE)
+_COMMAND_PLAY = int(MediaPlayerCommand.PLAY)
+
+
+MessageHandler = Callable[..., Iterable[OutgoingMessage]]
+
 
 class ESPHomeEntity:
+    __slots__ = ("server",)
+
+    # Exact message type -> handler, filled in by subclasses
+    _HANDLERS: Dict[type, MessageHandler] = {}
+
     def __init__(self, server: APIServer) -> None:
         self.server = server
 
-    @abstractmethod
-    def handle_message(self, msg: message.Message) -> Iterable[message.Message]:
-        pass
+    @property
+    def message_types(self) -> Iterable[type]:
+        """Message types this entity handles."""
+        return self._HANDLERS.keys()
+
+    def handle_message(self, msg: message.Message) -> Iterable[OutgoingMessage]:
+        handler = self._HANDLERS.get(type(msg))
+        if handler is None:
+            return ()
+
+        return handler(self, msg)
 
 
 # -----------------------------------------------------------------------------
 
 
 class MediaPlayerEntity(ESPHomeEntity):
+    __slots__ = (
+        "key",
+        "name",
+        "object_id",
+        "state",
+        "volume",
+        "muted",
+        "music_player",
+        "announce_player",
+        "_state_message",
+        "_list_entities_message",
+    )
+
     def __init__(
         self,
         server: APIServer,
@@ -57,13 +92,24 @@ class MediaPlayerEntity(ESPHomeEntity):
         self.muted = False
         self.music_player = music_player
         self.announce_player = announce_player
+        self._state_message: Optional[EncodedMessage] = None
+
+        # Entity description never changes, so it is only encoded once
+        self._list_entities_message = encode_message(
+            ListEntitiesMediaPlayerResponse(
+                object_id=self.object_id,
+                key=self.key,
+                name=self.name,
+                supports_pause=True,
+            )
+        )
 
     def play(
         self,
         url: Union[str, List[str]],
         announcement: bool = False,
         done_callback: Optional[Callable[[], None]] = None,
-    ) -> Iterable[message.Message]:
+    ) -> Iterable[OutgoingMessage]:
         if announcement:
             if self.music_player.is_playing:
                 # Announce, resume music
@@ -78,69 +124,89 @@ class MediaPlayerEntity(ESPHomeEntity):
                 # Announce, idle
                 self.announce_player.play(
                     url,
-                    done_callback=lambda: call_all(
-                        self.server.send_messages(
-                            [self._update_state(MediaPlayerState.IDLE)]
-                        ),
-                        done_callback,
-                    ),
+                    done_callback=lambda: call_all(self._send_idle, done_callback),
                 )
         else:
             # Music
             self.music_player.play(
                 url,
-                done_callback=lambda: call_all(
-                    self.server.send_messages(
-                        [self._update_state(MediaPlayerState.IDLE)]
-                    ),
-                    done_callback,
-                ),
+                done_callback=lambda: call_all(self._send_idle, done_callback),
             )
 
         yield self._update_state(MediaPlayerState.PLAYING)
 
-    def handle_message(self, msg: message.Message) -> Iterable[message.Message]:
-        if isinstance(msg, MediaPlayerCommandRequest) and (msg.key == self.key):
-            if msg.has_media_url:
-                announcement = msg.has_announcement and msg.announcement
-                yield from self.play(msg.media_url, announcement=announcement)
-            elif msg.has_command:
-                if msg.command == MediaPlayerCommand.PAUSE:
-                    self.music_player.pause()
-                    yield self._update_state(MediaPlayerState.PAUSED)
-                elif msg.command == MediaPlayerCommand.PLAY:
-                    self.music_player.resume()
-                    yield self._update_state(MediaPlayerState.PLAYING)
-            elif msg.has_volume:
-                volume = int(msg.volume * 100)
-                self.music_player.set_volume(volume)
-                self.announce_player.set_volume(volume)
-                self.volume = msg.volume
-                yield self._update_state(self.state)
-        elif isinstance(msg, ListEntitiesRequest):
-            yield ListEntitiesMediaPlayerResponse(
-                object_id=self.object_id,
-                key=self.key,
-                name=self.name,
-                supports_pause=True,
-            )
-        elif isinstance(msg, SubscribeHomeAssistantStatesRequest):
-            yield self._get_state_message()
+    def _handle_command(
+        self, msg: MediaPlayerCommandRequest
+    ) -> Iterable[OutgoingMessage]:
+        if msg.key != self.key:
+            return
+
+        if msg.has_media_url:
+            announcement = msg.has_announcement and msg.announcement
+            yield from self.play(msg.media_url, announcement=announcement)
+        elif msg.has_command:
+            if msg.command == _COMMAND_PAUSE:
+                self.music_player.pause()
+                yield self._update_state(MediaPlayerState.PAUSED)
+            elif msg.command == _COMMAND_PLAY:
+                self.music_player.resume()
+                yield self._update_state(MediaPlayerState.PLAYING)
+        elif msg.has_volume:
+            volume = int(msg.volume * 100)
+            self.music_player.set_volume(volume)
+            self.announce_player.set_volume(volume)
+            self.volume = msg.volume
+            yield self._update_state(self.state)
+
+    def _handle_list_entities(
+        self, msg: ListEntitiesRequest
+    ) -> Iterable[OutgoingMessage]:
+        yield self._list_entities_message
+
+    def _handle_subscribe_states(
+        self, msg: SubscribeHomeAssistantStatesRequest
+    ) -> Iterable[OutgoingMessage]:
+        yield self._get_state_message()
+
+    _HANDLERS: Dict[type, MessageHandler] = {
+        MediaPlayerCommandRequest: _handle_command,
+        ListEntitiesRequest: _handle_list_entities,
+        SubscribeHomeAssistantStatesRequest: _handle_subscribe_states,
+    }
+
+    def _send_idle(self) -> None:
+        self.server.send_messages([self._update_state(MediaPlayerState.IDLE)])
 
-    def _update_state(self, new_state: MediaPlayerState) -> MediaPlayerStateResponse:
+    def _update_state(self, new_state: MediaPlayerState) -> EncodedMessage:
         self.state = new_state
+        self._state_message = None
         return self._get_state_message()
 
-    def _get_state_message(self) -> MediaPlayerStateResponse:
-        return MediaPlayerStateResponse(
-            key=self.key,
-            state=self.state,
-            volume=self.volume,
-            muted=self.muted,
-        )
+    def _get_state_message(self) -> EncodedMessage:
+        # Cleared whenever state/volume changes
+        if self._state_message is None:
+            self._state_message = encode_message(
+                MediaPlayerStateResponse(
+                    key=self.key,
+                    state=self.state,
+                    volume=self.volume,
+                    muted=self.muted,
+                )
+            )
+
+        return self._state_message
 
 
 class TextAttributeEntity(ESPHomeEntity):
+    __slots__ = (
+        "key",
+        "name",
+        "object_id",
+        "text",
+        "_state_message",
+        "_list_entities_message",
+    )
+
     def __init__(
         self,
         server: APIServer,
@@ -155,33 +221,67 @@ class TextAttributeEntity(ESPHomeEntity):
         self.name = name
         self.object_id = object_id
         self.text = initial_text
+        self._state_message: Optional[EncodedMessage] = None
 
-    def update(self, text: str) -> TextSensorStateResponse:
-        # Truncate to 250 chars to stay within ESPHome text sensor limits
-        if len(text) > 250:
-            text = text[:247] + "..."
-        self.text = text
-        return self._get_state_message()
-
-    def handle_message(self, msg: message.Message) -> Iterable[message.Message]:
-        if isinstance(msg, ListEntitiesRequest):
-            yield ListEntitiesTextSensorResponse(
+        self._list_entities_message = encode_message(
+            ListEntitiesTextSensorResponse(
                 object_id=self.object_id,
                 key=self.key,
                 name=self.name,
             )
-        elif isinstance(msg, SubscribeHomeAssistantStatesRequest):
-            yield self._get_state_message()
-
-    def _get_state_message(self) -> TextSensorStateResponse:
-        return TextSensorStateResponse(
-            key=self.key,
-            state=self.text,
-            missing_state=False,
         )
 
+    def update(self, text: str) -> EncodedMessage:
+        self.set_silent(text)
+        return self._get_state_message()
+
+    def set_silent(self, text: str) -> None:
+        """Update the text without building a state message."""
+        # Truncate to 250 chars to stay within ESPHome text sensor limits
+        if len(text) > 250:
+            text = f"{text[:247]}..."
+        self.text = text
+        self._state_message = None
+
+    def _handle_list_entities(
+        self, msg: ListEntitiesRequest
+    ) -> Iterable[OutgoingMessage]:
+        yield self._list_entities_message
+
+    def _handle_subscribe_states(
+        self, msg: SubscribeHomeAssistantStatesRequest
+    ) -> Iterable[OutgoingMessage]:
+        yield self._get_state_message()
+
+    _HANDLERS: Dict[type, MessageHandler] = {
+        ListEntitiesRequest: _handle_list_entities,
+        SubscribeHomeAssistantStatesRequest: _handle_subscribe_states,
+    }
+
+    def _get_state_message(self) -> EncodedMessage:
+        if self._state_message is None:
+            self._state_message = encode_message(
+                TextSensorStateResponse(
+                    key=self.key,
+                    state=self.text,
+                    missing_state=False,
+                )
+            )
+
+        return self._state_message
+
 
 class SwitchEntity(ESPHomeEntity):
+    __slots__ = (
+        "key",
+        "name",
+        "object_id",
+        "state",
+        "on_change",
+        "_state_message",
+        "_list_entities_message",
+    )
+
     def __init__(
         self,
         server: APIServer,
@@ -197,43 +297,77 @@ class SwitchEntity(ESPHomeEntity):
         self.object_id = object_id
         self.state = initial_state
         self.on_change = on_change
+        self._state_message: Optional[EncodedMessage] = None
 
-    def set_state(self, new_state: bool) -> SwitchStateResponse:
-        self.state = new_state
-        return self._get_state_message()
-
-    def handle_message(self, msg: message.Message) -> Iterable[message.Message]:
-        if isinstance(msg, SwitchCommandRequest) and (msg.key == self.key):
-            import logging
-            logging.getLogger(__name__).info(
-                "Switch command received: key=%s state=%s object_id=%s", self.key, msg.state, self.object_id
-            )
-            self.state = msg.state
-            if self.on_change:
-                try:
-                    self.on_change(self.state)
-                except Exception:
-                    self.state = not self.state
-                    raise
-            yield self._get_state_message()
-        elif isinstance(msg, ListEntitiesRequest):
-            yield ListEntitiesSwitchResponse(
+        self._list_entities_message = encode_message(
+            ListEntitiesSwitchResponse(
                 object_id=self.object_id,
                 key=self.key,
                 name=self.name,
                 icon="mdi:microphone-off",
             )
-        elif isinstance(msg, SubscribeHomeAssistantStatesRequest):
-            yield self._get_state_message()
+        )
 
-    def _get_state_message(self) -> SwitchStateResponse:
-        return SwitchStateResponse(
-            key=self.key,
-            state=self.state,
+    def set_state(self, new_state: bool) -> EncodedMessage:
+        self.state = new_state
+        self._state_message = None
+        return self._get_state_message()
+
+    def _handle_command(self, msg: SwitchCommandRequest) -> Iterable[OutgoingMessage]:
+        if msg.key != self.key:
+            return
+
+        _LOGGER.info(
+            "Switch command received: key=%s state=%s object_id=%s", self.key, msg.state, self.object_id
         )
+        self.state = msg.state
+        self._state_message = None
+        if self.on_change:
+            try:
+                self.on_change(self.state)
+            except Exception:
+                self.state = not self.state
+                self._state_message = None
+                raise
+        yield self._get_state_message()
+
+    def _handle_list_entities(
+        self, msg: ListEntitiesRequest
+    ) -> Iterable[OutgoingMessage]:
+        yield self._list_entities_message
+
+    def _handle_subscribe_states(
+        self, msg: SubscribeHomeAssistantStatesRequest
+    ) -> Iterable[OutgoingMessage]:
+        yield self._get_state_message()
+
+    _HANDLERS: Dict[type, MessageHandler] = {
+        SwitchCommandRequest: _handle_command,
+        ListEntitiesRequest: _handle_list_entities,
+        SubscribeHomeAssistantStatesRequest: _handle_subscribe_states,
+    }
+
+    def _get_state_message(self) -> EncodedMessage:
+        if self._state_message is None:
+            self._state_message = encode_message(
+                SwitchStateResponse(
+                    key=self.key,
+                    state=self.state,
+                )
+            )
+
+        return self._state_message
 
 
 class ButtonEntity(ESPHomeEntity):
+    __slots__ = (
+        "key",
+        "name",
+        "object_id",
+        "on_press",
+        "_list_entities_message",
+    )
+
     def __init__(
         self,
         server: APIServer,
@@ -248,25 +382,38 @@ class ButtonEntity(ESPHomeEntity):
         self.object_id = object_id
         self.on_press = on_press
 
-    def handle_message(self, msg: message.Message) -> Iterable[message.Message]:
-        if isinstance(msg, ButtonCommandRequest) and (msg.key == self.key):
-            import logging
-            logging.getLogger(__name__).info(
-                "Button pressed: key=%s object_id=%s", self.key, self.object_id
-            )
-            if self.on_press:
-                try:
-                    self.on_press()
-                except Exception as e:
-                    logging.getLogger(__name__).error("Error handling button press: %s", e)
-                    raise
-        elif isinstance(msg, ListEntitiesRequest):
-            yield ListEntitiesButtonResponse(
+        self._list_entities_message = encode_message(
+            ListEntitiesButtonResponse(
                 object_id=self.object_id,
                 key=self.key,
                 name=self.name,
                 icon="mdi:microphone",
             )
-        elif isinstance(msg, SubscribeHomeAssistantStatesRequest):
-            # Buttons don't have state to report
-            pass
+        )
+
+    def _handle_command(self, msg: ButtonCommandRequest) -> Iterable[OutgoingMessage]:
+        if msg.key != self.key:
+            return ()
+
+        _LOGGER.info(
+            "Button pressed: key=%s object_id=%s", self.key, self.object_id
+        )
+        if self.on_press:
+            try:
+                self.on_press()
+            except Exception as e:
+                _LOGGER.error("Error handling button press: %s", e)
+                raise
+
+        return ()
+
+    def _handle_list_entities(
+        self, msg: ListEntitiesRequest
+    ) -> Iterable[OutgoingMessage]:
+        yield self._list_entities_message
+
+    # Buttons don't have state to report
+    _HANDLERS: Dict[type, MessageHandler] = {
+        ButtonCommandRequest: _handle_command,
+        ListEntitiesRequest: _handle_list_entities,
+    }
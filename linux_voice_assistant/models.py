@@ -2,16 +2,23 @@
 
 import json
 import logging
-from dataclasses import asdict, dataclass, field
+import os
+from dataclasses import dataclass, field
 from enum import Enum
 from pathlib import Path
 from queue import Queue
-from typing import TYPE_CHECKING, Dict, List, Optional, Set, Union
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Set, Union
 
 if TYPE_CHECKING:
+    from concurrent.futures import ThreadPoolExecutor
+
+    from aioesphomeapi.api_pb2 import (  # type: ignore[attr-defined]
+        VoiceAssistantWakeWord,
+    )
     from pymicro_wakeword import MicroWakeWord
     from pyopen_wakeword import OpenWakeWord
 
+    from .api_server import EncodedMessage
     from .entity import ESPHomeEntity, MediaPlayerEntity, TextAttributeEntity
     from .mpv_player import MpvMediaPlayer
     from .satellite import VoiceSatelliteProtocol
@@ -24,7 +31,7 @@ class WakeWordType(str, Enum):
     OPEN_WAKE_WORD = "openWakeWord"
 
 
-@dataclass
+@dataclass(slots=True)
 class AvailableWakeWord:
     id: str
     type: WakeWordType
@@ -49,14 +56,17 @@ class AvailableWakeWord:
         raise ValueError(f"Unexpected wake word type: {self.type}")
 
 
-@dataclass
+@dataclass(slots=True)
 class Preferences:
     """Per-instance preferences (kept minimal by design)."""
 
     active_wake_words: List[str] = field(default_factory=list)
 
+    def to_dict(self) -> Dict[str, Any]:
+        return {"active_wake_words": self.active_wake_words}
+
 
-@dataclass
+@dataclass(slots=True)
 class GlobalPreferences:
     """Shared settings across all instances."""
 
@@ -65,8 +75,16 @@ class GlobalPreferences:
     ha_token: Optional[str] = None
     ha_history_entity: Optional[str] = None
 
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "wake_word_friendly_names": self.wake_word_friendly_names,
+            "ha_base_url": self.ha_base_url,
+            "ha_token": self.ha_token,
+            "ha_history_entity": self.ha_history_entity,
+        }
 
-@dataclass
+
+@dataclass(slots=True)
 class ServerState:
     name: str
     mac_address: str
@@ -86,6 +104,10 @@ class ServerState:
     global_preferences_path: Path
     download_dir: Path
 
+    # Runs blocking file/HTTP work off the event loop, in order. Shared by all
+    # connections and shut down when the server stops.
+    io_executor: "ThreadPoolExecutor"
+
     media_player_entity: "Optional[MediaPlayerEntity]" = None
     active_tts_entity: "Optional[TextAttributeEntity]" = None
     active_stt_entity: "Optional[TextAttributeEntity]" = None
@@ -101,10 +123,21 @@ class ServerState:
     mute_entity: "Optional[ESPHomeEntity]" = None
     push_button_entity: "Optional[ESPHomeEntity]" = None
 
+    # Encoded DeviceInfoResponse, shared by all connections
+    device_info_message: "Optional[EncodedMessage]" = None
+
+    # Built from available_wake_words; reset to None when that changes
+    available_wake_word_messages: "Optional[List[VoiceAssistantWakeWord]]" = None
+
     def save_preferences(self) -> None:
         """Save per-instance preferences (currently active wake words)."""
         _LOGGER.debug("Saving preferences: %s", self.preferences_path)
         self.preferences_path.parent.mkdir(parents=True, exist_ok=True)
-        to_save = {"active_wake_words": self.preferences.active_wake_words}
-        with open(self.preferences_path, "w", encoding="utf-8") as preferences_file:
+        to_save = self.preferences.to_dict()
+
+        # Write then rename so a crash can't leave a truncated file behind
+        temp_path = self.preferences_path.with_suffix(".tmp")
+        with open(temp_path, "w", encoding="utf-8") as preferences_file:
             json.dump(to_save, preferences_file, ensure_ascii=False, indent=4)
+
+        os.replace(temp_path, self.preferences_path)
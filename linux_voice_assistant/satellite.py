@@ -2,15 +2,27 @@
 
 import asyncio
 import hashlib
+import http.client
 import logging
+import os
 import posixpath
 import shutil
 import subprocess
-import time
+import sys
+import threading
 from collections.abc import Iterable
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, Optional, Set, Union
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    List,
+    Optional,
+    Tuple,
+    Union,
+    overload,
+)
 from urllib.parse import urlparse, urlunparse
 from urllib.request import urlopen, Request
 import json
@@ -30,6 +42,7 @@ from aioesphomeapi.api_pb2 import (  # type: ignore[attr-defined]
     VoiceAssistantAudio,
     VoiceAssistantConfigurationRequest,
     VoiceAssistantConfigurationResponse,
+    VoiceAssistantEventData,
     VoiceAssistantEventResponse,
     VoiceAssistantExternalWakeWord,
     VoiceAssistantRequest,
@@ -46,22 +59,203 @@ from google.protobuf import message
 from pymicro_wakeword import MicroWakeWord
 from pyopen_wakeword import OpenWakeWord
 
-from .api_server import APIServer
-from .entity import ButtonEntity, MediaPlayerEntity, TextAttributeEntity, SwitchEntity
+from .api_server import APIServer, OutgoingMessage, encode_message
+from .entity import (
+    ButtonEntity,
+    ESPHomeEntity,
+    MediaPlayerEntity,
+    MessageHandler,
+    SwitchEntity,
+    TextAttributeEntity,
+)
 from .models import AvailableWakeWord, ServerState, WakeWordType
-from .util import call_all
 
 _LOGGER = logging.getLogger(__name__)
 
+try:
+    from Xlib import display as xlib_display  # type: ignore
+    from Xlib.ext import dpms as xlib_dpms  # type: ignore
+except ImportError:
+    # Optional: fall back to running xset
+    xlib_display = None
+
+# Open X connections by display name, used only while holding _X_DISPLAYS_LOCK
+_X_DISPLAYS: Dict[str, Any] = {}
+_X_DISPLAYS_LOCK = threading.Lock()
+
+# Voice events also logged at INFO for external monitoring
+_INFO_VOICE_EVENTS = frozenset(
+    (
+        VoiceAssistantEventType.VOICE_ASSISTANT_RUN_START,
+        VoiceAssistantEventType.VOICE_ASSISTANT_TTS_END,
+    )
+)
+
+# Messages without per-call fields, encoded once
+_REQUEST_START = encode_message(VoiceAssistantRequest(start=True))
+_ANNOUNCE_FINISHED = encode_message(VoiceAssistantAnnounceFinished())
+
+# Wake words Home Assistant may activate at once
+_MAX_ACTIVE_WAKE_WORDS = 2
+
+# Contents of the shared mute flag file
+_MUTE_ON = b"on"
+_MUTE_OFF = b"off"
+
+# Seconds of silence between repeats of the timer finished sound
+_TIMER_REPEAT_DELAY = 1.0
+
+# Seconds to wait for Home Assistant when syncing conversation history
+_HA_SYNC_TIMEOUT = 5.0
+
+_REPO_LOG_PATH = Path(__file__).parent.parent / "lvas_log"
+_SHM_LOG_PATH = Path("/dev/shm/lvas_log")
+_TMP_LOG_PATH = Path("/tmp/lvas_log")
+
+# Number of log lines sent to Home Assistant as conversation history
+_HISTORY_LINES = 100
+_TAIL_BLOCK_SIZE = 8192
+
+_HASH_CHUNK_SIZE = 1 << 20
+_DOWNLOAD_CHUNK_SIZE = 1 << 20
+
+
+def _resolve_log_path() -> Path:
+    """Find the unified lvas_log shared by all instances."""
+    # Use the symlink if available, otherwise fall back to tmpfs
+    for log_path in (_REPO_LOG_PATH, _SHM_LOG_PATH):
+        if log_path.exists():
+            return log_path
+
+    return _TMP_LOG_PATH
+
+
+def _read_tail(path: Path, num_lines: int) -> List[bytes]:
+    """Return the last num_lines lines of a file without reading all of it."""
+    with open(path, "rb") as f:
+        pos = f.seek(0, os.SEEK_END)
+        data = b""
+        # One extra newline for the line being cut off at the block boundary
+        while pos > 0 and data.count(b"\n") <= num_lines:
+            read_size = min(_TAIL_BLOCK_SIZE, pos)
+            pos -= read_size
+            f.seek(pos)
+            data = f.read(read_size) + data
+
+    lines = data.splitlines(keepends=True)
+    return lines[-num_lines:]
+
+
+def _download_request(url: str) -> Request:
+    """Build a request for a wake word file, asking for the raw bytes."""
+    return Request(url, headers={"Accept-Encoding": "identity"})
+
+
+def _sha256_file(path: Path) -> str:
+    """Return the hex SHA-256 digest of a file, hashed in chunks."""
+    with open(path, "rb") as f:
+        if sys.version_info >= (3, 11):
+            return hashlib.file_digest(f, "sha256").hexdigest()
+
+        digest = hashlib.sha256()
+        buf = bytearray(_HASH_CHUNK_SIZE)
+        view = memoryview(buf)
+        while size := f.readinto(buf):
+            digest.update(view[:size])
+
+        return digest.hexdigest()
+
+
+class _EventData:
+    """Read-only view of pipeline event data, searched on demand.
+
+    Most events never look at their data, so no dict is built for them.
+    """
+
+    __slots__ = ("_args",)
+
+    def __init__(self, args: Iterable[VoiceAssistantEventData]) -> None:
+        self._args = args
+
+    @overload
+    def get(self, name: str) -> Optional[str]:
+        ...
+
+    @overload
+    def get(self, name: str, default: str) -> str:
+        ...
+
+    def get(self, name: str, default: Optional[str] = None) -> Optional[str]:
+        for arg in self._args:
+            if arg.name == name:
+                return arg.value
+
+        return default
+
+    def __repr__(self) -> str:
+        return repr({arg.name: arg.value for arg in self._args})
+
+
+def _voice_event_name(event_type: int) -> str:
+    event = VoiceAssistantEventType.convert(event_type)
+    return event.name if event is not None else str(event_type)
+
+
+def _get_x_display(display: str) -> Optional[Any]:
+    """Return a cached X connection with DPMS, or None if unavailable.
+
+    Must be called with _X_DISPLAYS_LOCK held.
+    """
+    if xlib_display is None:
+        return None
+
+    x_display = _X_DISPLAYS.get(display)
+    if x_display is None:
+        try:
+            x_display = xlib_display.Display(display)
+        except Exception as e:
+            _LOGGER.debug("Could not connect to X display %s: %s", display, e)
+            return None
+
+        if not x_display.has_extension("DPMS"):
+            _LOGGER.debug("X display %s has no DPMS extension", display)
+            x_display.close()
+            return None
+
+        _X_DISPLAYS[display] = x_display
+
+    return x_display
+
 
 def _set_screen_dpms(timeout: int, display: str = ":0") -> None:
-    """Set screen DPMS timeout using xset.
+    """Set screen DPMS timeout over X, falling back to xset.
     
     Args:
         timeout: Seconds until screen turns off (0 to force on immediately)
         display: X display to target (default :0)
     """
-    import os
+    # Called from the event loop and the player thread, and python-xlib
+    # connections are not thread-safe
+    with _X_DISPLAYS_LOCK:
+        x_display = _get_x_display(display)
+        if x_display is not None:
+            try:
+                x_display.dpms_enable()
+                sleep_timeout = timeout
+                if timeout == 0:
+                    # Force screen on and stay awake for 10 minutes
+                    x_display.dpms_force_level(xlib_dpms.DPMSModeOn)
+                    sleep_timeout = 600
+
+                x_display.dpms_set_timeouts(
+                    sleep_timeout, sleep_timeout, sleep_timeout
+                )
+                x_display.sync()
+                return
+            except Exception as e:
+                _LOGGER.debug("Lost X display %s: %s", display, e)
+                _X_DISPLAYS.pop(display, None)
+
     try:
         env = os.environ.copy()
         env["DISPLAY"] = display
@@ -99,7 +293,7 @@ class VoiceSatelliteProtocol(APIServer):
 
         self.state = state
         self.state.satellite = self
-        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._set_wake_words_task: Optional[asyncio.Task] = None
 
         if self.state.media_player_entity is None:
             self.state.media_player_entity = MediaPlayerEntity(
@@ -145,9 +339,14 @@ class VoiceSatelliteProtocol(APIServer):
                 self.state.software_mute = new_state
                 # Persist shared flag
                 try:
-                    self.state.shared_mute_path.write_text(
-                        "on" if new_state else "off", encoding="utf-8"
+                    # Other instances poll this file; never expose a partial write.
+                    # The temp name is per thread, as toggles can race each other.
+                    mute_path = self.state.shared_mute_path
+                    temp_path = mute_path.with_name(
+                        f"{mute_path.name}.{os.getpid()}.{threading.get_ident()}.tmp"
                     )
+                    temp_path.write_bytes(_MUTE_ON if new_state else _MUTE_OFF)
+                    os.replace(temp_path, mute_path)
                 except Exception:
                     _LOGGER.warning("Failed to write shared mute flag to %s", self.state.shared_mute_path, exc_info=True)
 
@@ -184,9 +383,9 @@ class VoiceSatelliteProtocol(APIServer):
                     )
                     phrase = friendly
 
-                self._update_active_assistant(phrase)
-                self.send_messages(
-                    [VoiceAssistantRequest(start=True, wake_word_phrase=phrase)]
+                self._update_active_many(
+                    [(self.state.active_assistant_entity, phrase)],
+                    VoiceAssistantRequest(start=True, wake_word_phrase=phrase),
                 )
                 self.duck()
                 self._is_streaming_audio = True
@@ -201,6 +400,12 @@ class VoiceSatelliteProtocol(APIServer):
             )
             self.state.entities.append(self.state.push_button_entity)
 
+        # Message type -> entities that handle it, in entity order
+        self._entities_by_msg: Dict[type, List[ESPHomeEntity]] = {}
+        for entity in self.state.entities:
+            for msg_type in entity.message_types:
+                self._entities_by_msg.setdefault(msg_type, []).append(entity)
+
         self._is_streaming_audio = False
         self._tts_url: Optional[str] = None
         self._tts_played = False
@@ -209,71 +414,115 @@ class VoiceSatelliteProtocol(APIServer):
         self._external_wake_words: Dict[str, VoiceAssistantExternalWakeWord] = {}
         self._current_assistant_name: str = "Assistant"
         self._screen_management_timeout = state.screen_management
+
+        # Conversation log entries are appended in batches on the I/O executor
+        self._log_path = _resolve_log_path()
+        self._log_fd: Optional[int] = None
+        self._pending_log: List[str] = []
+        self._pending_log_lock = threading.Lock()
+
+        # Blocking file/HTTP work is run here, off the event loop, in order
+        self._io_executor = state.io_executor
+
+        # Kept-alive connection for history sync, used only on the I/O executor
+        self._ha_connection: Optional[http.client.HTTPConnection] = None
+        self._ha_connection_url: Optional[str] = None
+        self._ha_path_prefix = ""
         
         _LOGGER.info("Screen management timeout: %d seconds", self._screen_management_timeout)
 
 
-    def handle_voice_event(
-        self, event_type: VoiceAssistantEventType, data: Dict[str, str]
-    ) -> None:
-        _LOGGER.debug("Voice event: type=%s, data=%s", event_type.name, data)
+    def handle_voice_event(self, event_type: int, data: _EventData) -> None:
+        if _LOGGER.isEnabledFor(logging.DEBUG):
+            _LOGGER.debug(
+                "Voice event: type=%s, data=%s", _voice_event_name(event_type), data
+            )
         
         # Log conversation start/end at INFO for external monitoring
-        if event_type in (VoiceAssistantEventType.VOICE_ASSISTANT_RUN_START,
-                          VoiceAssistantEventType.VOICE_ASSISTANT_TTS_END):
-            _LOGGER.info("Voice event: %s", event_type.name)
-
-        if event_type == VoiceAssistantEventType.VOICE_ASSISTANT_RUN_START:
-            self._tts_url = data.get("url")
-            self._tts_played = False
-            self._continue_conversation = False
-            self._update_active_stt("")
-            self._update_active_tts("")
-            if self._screen_management_timeout > 0:
-                _LOGGER.info("Waking screen for voice interaction")
-                _set_screen_dpms(0)  # Wake screen immediately
-        elif event_type == VoiceAssistantEventType.VOICE_ASSISTANT_STT_START:
-            self._update_active_stt("")
-        elif event_type == VoiceAssistantEventType.VOICE_ASSISTANT_STT_VAD_START:
-            self._update_active_stt("")
-        elif event_type == VoiceAssistantEventType.VOICE_ASSISTANT_STT_VAD_END:
-            self._is_streaming_audio = False
-            self._update_active_stt("")
-        elif event_type == VoiceAssistantEventType.VOICE_ASSISTANT_STT_END:
-            self._is_streaming_audio = False
-            stt_text = data.get("text", data.get("stt", ""))
-            self._update_active_stt(stt_text)
-            self._log_to_file(f"User: {stt_text}")
-        elif event_type == VoiceAssistantEventType.VOICE_ASSISTANT_INTENT_PROGRESS:
-            if data.get("tts_start_streaming") == "1":
-                # Start streaming early
-                self.play_tts()
-        elif event_type == VoiceAssistantEventType.VOICE_ASSISTANT_INTENT_END:
-            if data.get("continue_conversation") == "1":
-                self._continue_conversation = True
-        elif event_type == VoiceAssistantEventType.VOICE_ASSISTANT_TTS_START:
-            tts_text = data.get("text", "")
-            self._update_active_tts(tts_text)
-            self._log_to_file(f"{self._current_assistant_name}: {tts_text}")
-            self._sync_history_to_ha()
-        elif event_type == VoiceAssistantEventType.VOICE_ASSISTANT_TTS_END:
-            self._tts_url = data.get("url")
-            self.play_tts()
-        elif event_type == VoiceAssistantEventType.VOICE_ASSISTANT_RUN_END:
-            self._is_streaming_audio = False
-            if not self._tts_played:
-                self._tts_finished()
+        if event_type in _INFO_VOICE_EVENTS:
+            _LOGGER.info("Voice event: %s", _voice_event_name(event_type))
 
-            self._tts_played = False
+        handler = self._VOICE_EVENT_HANDLERS.get(event_type)
+        if handler is not None:
+            handler(self, data)
 
         # TODO: handle error
 
+    def _on_run_start(self, data: _EventData) -> None:
+        self._tts_url = data.get("url")
+        self._tts_played = False
+        self._continue_conversation = False
+        self._update_active_many(
+            [
+                (self.state.active_stt_entity, ""),
+                (self.state.active_tts_entity, ""),
+            ]
+        )
+        if self._screen_management_timeout > 0:
+            _LOGGER.info("Waking screen for voice interaction")
+            _set_screen_dpms(0)  # Wake screen immediately
+
+    def _on_stt_start(self, data: _EventData) -> None:
+        self._update_active_stt("")
+
+    def _on_stt_vad_end(self, data: _EventData) -> None:
+        self._is_streaming_audio = False
+        self._update_active_stt("")
+
+    def _on_stt_end(self, data: _EventData) -> None:
+        self._is_streaming_audio = False
+        stt_text = data.get("text", data.get("stt", ""))
+        self._update_active_stt(stt_text)
+        self._log_to_file(f"User: {stt_text}")
+
+    def _on_intent_progress(self, data: _EventData) -> None:
+        if data.get("tts_start_streaming") == "1":
+            # Start streaming early
+            self.play_tts()
+
+    def _on_intent_end(self, data: _EventData) -> None:
+        if data.get("continue_conversation") == "1":
+            self._continue_conversation = True
+
+    def _on_tts_start(self, data: _EventData) -> None:
+        tts_text = data.get("text", "")
+        self._update_active_tts(tts_text)
+        self._log_to_file(f"{self._current_assistant_name}: {tts_text}")
+        self._io_executor.submit(self._sync_history_to_ha)
+
+    def _on_tts_end(self, data: _EventData) -> None:
+        self._tts_url = data.get("url")
+        self.play_tts()
+
+    def _on_run_end(self, data: _EventData) -> None:
+        self._is_streaming_audio = False
+        if not self._tts_played:
+            self._tts_finished()
+
+        self._tts_played = False
+
+    # Raw event type -> handler (IntEnum keys hash like their int values)
+    _VOICE_EVENT_HANDLERS: Dict[int, Callable[..., None]] = {
+        VoiceAssistantEventType.VOICE_ASSISTANT_RUN_START: _on_run_start,
+        VoiceAssistantEventType.VOICE_ASSISTANT_STT_START: _on_stt_start,
+        VoiceAssistantEventType.VOICE_ASSISTANT_STT_VAD_START: _on_stt_start,
+        VoiceAssistantEventType.VOICE_ASSISTANT_STT_VAD_END: _on_stt_vad_end,
+        VoiceAssistantEventType.VOICE_ASSISTANT_STT_END: _on_stt_end,
+        VoiceAssistantEventType.VOICE_ASSISTANT_INTENT_PROGRESS: _on_intent_progress,
+        VoiceAssistantEventType.VOICE_ASSISTANT_INTENT_END: _on_intent_end,
+        VoiceAssistantEventType.VOICE_ASSISTANT_TTS_START: _on_tts_start,
+        VoiceAssistantEventType.VOICE_ASSISTANT_TTS_END: _on_tts_end,
+        VoiceAssistantEventType.VOICE_ASSISTANT_RUN_END: _on_run_end,
+    }
+
     def handle_timer_event(
         self,
         event_type: VoiceAssistantTimerEventType,
         msg: VoiceAssistantTimerEventResponse,
     ) -> None:
-        _LOGGER.debug("Timer event: type=%s", event_type.name)
+        if _LOGGER.isEnabledFor(logging.DEBUG):
+            _LOGGER.debug("Timer event: type=%s", event_type.name)
+
         if event_type == VoiceAssistantTimerEventType.VOICE_ASSISTANT_TIMER_FINISHED:
             if not self._timer_finished:
                 self.state.active_wake_words.add(self.state.stop_word.id)
@@ -281,66 +530,84 @@ class VoiceSatelliteProtocol(APIServer):
                 self.duck()
                 self._play_timer_finished()
 
-    def handle_message(self, msg: message.Message) -> Iterable[message.Message]:
-        if isinstance(msg, VoiceAssistantEventResponse):
-            # Pipeline event
-            data: Dict[str, str] = {}
-            for arg in msg.data:
-                data[arg.name] = arg.value
+    def handle_message(self, msg: message.Message) -> Iterable[OutgoingMessage]:
+        handler = self._HANDLERS.get(type(msg))
+        if handler is None:
+            return ()
 
-            self.handle_voice_event(VoiceAssistantEventType(msg.event_type), data)
-        elif isinstance(msg, VoiceAssistantAnnounceRequest):
-            _LOGGER.debug("Announcing: %s", msg.text)
+        return handler(self, msg)
 
-            assert self.state.media_player_entity is not None
+    def _handle_voice_event(
+        self, msg: VoiceAssistantEventResponse
+    ) -> Iterable[OutgoingMessage]:
+        # Pipeline event
+        self.handle_voice_event(msg.event_type, _EventData(msg.data))
+        return ()
 
-            urls = []
-            if msg.preannounce_media_id:
-                urls.append(msg.preannounce_media_id)
+    def _handle_announce(
+        self, msg: VoiceAssistantAnnounceRequest
+    ) -> Iterable[OutgoingMessage]:
+        _LOGGER.debug("Announcing: %s", msg.text)
 
-            urls.append(msg.media_id)
+        assert self.state.media_player_entity is not None
 
-            self._update_active_tts(msg.text)
+        urls = []
+        if msg.preannounce_media_id:
+            urls.append(msg.preannounce_media_id)
 
-            self.state.active_wake_words.add(self.state.stop_word.id)
-            self._continue_conversation = msg.start_conversation
+        urls.append(msg.media_id)
 
-            self.duck()
-            yield from self.state.media_player_entity.play(
-                urls, announcement=True, done_callback=self._tts_finished
-            )
-        elif isinstance(msg, VoiceAssistantTimerEventResponse):
-            self.handle_timer_event(VoiceAssistantTimerEventType(msg.event_type), msg)
-        elif isinstance(msg, DeviceInfoRequest):
-            yield DeviceInfoResponse(
-                uses_password=False,
-                name=self.state.name,
-                mac_address=self.state.mac_address,
-                voice_assistant_feature_flags=(
-                    VoiceAssistantFeature.VOICE_ASSISTANT
-                    | VoiceAssistantFeature.API_AUDIO
-                    | VoiceAssistantFeature.ANNOUNCE
-                    | VoiceAssistantFeature.START_CONVERSATION
-                    | VoiceAssistantFeature.TIMERS
-                ),
+        self._update_active_tts(msg.text)
+
+        self.state.active_wake_words.add(self.state.stop_word.id)
+        self._continue_conversation = msg.start_conversation
+
+        self.duck()
+        return self.state.media_player_entity.play(
+            urls, announcement=True, done_callback=self._tts_finished
+        )
+
+    def _handle_timer_event(
+        self, msg: VoiceAssistantTimerEventResponse
+    ) -> Iterable[OutgoingMessage]:
+        self.handle_timer_event(VoiceAssistantTimerEventType(msg.event_type), msg)
+        return ()
+
+    def _handle_device_info(self, msg: DeviceInfoRequest) -> Iterable[OutgoingMessage]:
+        if self.state.device_info_message is None:
+            # Name and MAC don't change, so encode once per process
+            self.state.device_info_message = encode_message(
+                DeviceInfoResponse(
+                    uses_password=False,
+                    name=self.state.name,
+                    mac_address=self.state.mac_address,
+                    voice_assistant_feature_flags=(
+                        VoiceAssistantFeature.VOICE_ASSISTANT
+                        | VoiceAssistantFeature.API_AUDIO
+                        | VoiceAssistantFeature.ANNOUNCE
+                        | VoiceAssistantFeature.START_CONVERSATION
+                        | VoiceAssistantFeature.TIMERS
+                    ),
+                )
             )
-        elif isinstance(
-            msg,
-            (
-                ListEntitiesRequest,
-                SubscribeHomeAssistantStatesRequest,
-                MediaPlayerCommandRequest,
-                SwitchCommandRequest,
-                ButtonCommandRequest,
-            ),
-        ):
-            for entity in self.state.entities:
-                yield from entity.handle_message(msg)
-
-            if isinstance(msg, ListEntitiesRequest):
-                yield ListEntitiesDoneResponse()
-        elif isinstance(msg, VoiceAssistantConfigurationRequest):
-            available_wake_words = [
+
+        yield self.state.device_info_message
+
+    def _handle_entity_message(
+        self, msg: message.Message
+    ) -> Iterable[OutgoingMessage]:
+        for entity in self._entities_by_msg.get(type(msg), ()):
+            yield from entity.handle_message(msg)
+
+        if isinstance(msg, ListEntitiesRequest):
+            yield ListEntitiesDoneResponse()
+
+    def _handle_configuration(
+        self, msg: VoiceAssistantConfigurationRequest
+    ) -> Iterable[OutgoingMessage]:
+        if self.state.available_wake_word_messages is None:
+            # Rebuilt only when available wake words change
+            self.state.available_wake_word_messages = [
                 VoiceAssistantWakeWord(
                     id=ww.id,
                     wake_word=ww.wake_word,
@@ -349,81 +616,118 @@ class VoiceSatelliteProtocol(APIServer):
                 for ww in self.state.available_wake_words.values()
             ]
 
-            for eww in msg.external_wake_words:
-                if eww.model_type != "micro":
-                    continue
+        available_wake_words = list(self.state.available_wake_word_messages)
 
-                available_wake_words.append(
-                    VoiceAssistantWakeWord(
-                        id=eww.id,
-                        wake_word=eww.wake_word,
-                        trained_languages=eww.trained_languages,
-                    )
+        for eww in msg.external_wake_words:
+            if eww.model_type != "micro":
+                continue
+
+            available_wake_words.append(
+                VoiceAssistantWakeWord(
+                    id=eww.id,
+                    wake_word=eww.wake_word,
+                    trained_languages=eww.trained_languages,
                 )
+            )
 
-                self._external_wake_words[eww.id] = eww
+            self._external_wake_words[eww.id] = eww
 
-            # Store event loop reference for callbacks from other threads
-            if self._loop is None:
-                try:
-                    self._loop = asyncio.get_running_loop()
-                except RuntimeError:
-                    pass
-            
-            yield VoiceAssistantConfigurationResponse(
-                available_wake_words=available_wake_words,
-                active_wake_words=[
-                    ww.id
-                    for ww in self.state.wake_words.values()
-                    if ww.id in self.state.active_wake_words
-                ],
-                max_active_wake_words=2,
-            )
-            _LOGGER.info("Connected to Home Assistant")
-
-        elif isinstance(msg, VoiceAssistantSetConfiguration):
-            # Change active wake words
-            active_wake_words: Set[str] = set()
-
-            for wake_word_id in msg.active_wake_words:
-                if wake_word_id in self.state.wake_words:
-                    # Already active
-                    active_wake_words.add(wake_word_id)
-                    continue
-
-                model_info = self.state.available_wake_words.get(wake_word_id)
-                if not model_info:
-                    # Check external wake words (may require download)
-                    external_wake_word = self._external_wake_words.get(wake_word_id)
-                    if not external_wake_word:
-                        continue
+        yield VoiceAssistantConfigurationResponse(
+            available_wake_words=available_wake_words,
+            active_wake_words=[
+                ww.id
+                for ww in self.state.wake_words.values()
+                if ww.id in self.state.active_wake_words
+            ],
+            max_active_wake_words=_MAX_ACTIVE_WAKE_WORDS,
+        )
+        _LOGGER.info("Connected to Home Assistant")
 
-                    model_info = self._download_external_wake_word(external_wake_word)
-                    if not model_info:
-                        continue
+    def _handle_set_configuration(
+        self, msg: VoiceAssistantSetConfiguration
+    ) -> Iterable[OutgoingMessage]:
+        # External wake words may need downloading, which blocks
+        if self._set_wake_words_task is not None:
+            self._set_wake_words_task.cancel()
+
+        self._set_wake_words_task = asyncio.get_running_loop().create_task(
+            self._set_active_wake_words(list(msg.active_wake_words))
+        )
+        return ()
+
+    # Exact message type -> handler
+    _HANDLERS: Dict[type, MessageHandler] = {
+        VoiceAssistantEventResponse: _handle_voice_event,
+        VoiceAssistantAnnounceRequest: _handle_announce,
+        VoiceAssistantTimerEventResponse: _handle_timer_event,
+        DeviceInfoRequest: _handle_device_info,
+        ListEntitiesRequest: _handle_entity_message,
+        SubscribeHomeAssistantStatesRequest: _handle_entity_message,
+        MediaPlayerCommandRequest: _handle_entity_message,
+        SwitchCommandRequest: _handle_entity_message,
+        ButtonCommandRequest: _handle_entity_message,
+        VoiceAssistantConfigurationRequest: _handle_configuration,
+        VoiceAssistantSetConfiguration: _handle_set_configuration,
+    }
+
+    async def _set_active_wake_words(self, wake_word_ids: List[str]) -> None:
+        """Change active wake words, downloading external models if needed."""
+        # Runs as a task, so log failures here instead of leaving them on the task
+        try:
+            activated: List[str] = []
+
+            for wake_word_id in wake_word_ids:
+                if len(activated) >= _MAX_ACTIVE_WAKE_WORDS:
+                    break
 
-                    self.state.available_wake_words[wake_word_id] = model_info
+                if wake_word_id not in self.state.wake_words:
+                    model_info = await self._resolve_wake_word(wake_word_id)
+                    if model_info is None:
+                        continue
 
-                _LOGGER.debug("Loading wake word: %s", model_info.wake_word_path)
-                self.state.wake_words[wake_word_id] = model_info.load()
+                    _LOGGER.debug("Loading wake word: %s", model_info.wake_word_path)
+                    self.state.wake_words[wake_word_id] = model_info.load()
+                    _LOGGER.info("Wake word set: %s", wake_word_id)
 
-                _LOGGER.info("Wake word set: %s", wake_word_id)
-                active_wake_words.add(wake_word_id)
-                break
+                activated.append(wake_word_id)
 
+            active_wake_words = set(activated)
             self.state.active_wake_words = active_wake_words
             _LOGGER.debug("Active wake words: %s", active_wake_words)
 
             self.state.preferences.active_wake_words = list(active_wake_words)
             self.state.save_preferences()
             self.state.wake_words_changed = True
+        except Exception:
+            _LOGGER.exception("Failed to set active wake words: %s", wake_word_ids)
 
-    def handle_audio(self, audio_chunk: bytes) -> None:
+    async def _resolve_wake_word(
+        self, wake_word_id: str
+    ) -> Optional[AvailableWakeWord]:
+        """Find a wake word's model, downloading an external one if needed."""
+        model_info = self.state.available_wake_words.get(wake_word_id)
+        if model_info is not None:
+            return model_info
+
+        external_wake_word = self._external_wake_words.get(wake_word_id)
+        if external_wake_word is None:
+            return None
+
+        # The single I/O worker serializes downloads, so a superseded
+        # configuration can't write the same model file concurrently. Each
+        # download re-checks the files on disk before fetching anything.
+        model_info = await asyncio.get_running_loop().run_in_executor(
+            self._io_executor, self._download_external_wake_word, external_wake_word
+        )
+        if model_info is not None:
+            self.state.available_wake_words[wake_word_id] = model_info
+            self.state.available_wake_word_messages = None
 
-        if not self._is_streaming_audio:
-            return
+        return model_info
 
-        self.send_messages([VoiceAssistantAudio(data=audio_chunk)])
+    def handle_audio(self, audio_chunk: bytes) -> None:
+        if self._is_streaming_audio:
+            self.send_encoded(encode_message(VoiceAssistantAudio(data=audio_chunk)))
 
     def wakeup(self, wake_word: Union[MicroWakeWord, OpenWakeWord]) -> None:
         if self._timer_finished:
@@ -441,9 +745,9 @@ class VoiceSatelliteProtocol(APIServer):
         friendly_name = self.state.global_preferences.wake_word_friendly_names.get(wake_word_id, wake_word_phrase)
         self._current_assistant_name = friendly_name
         
-        self._update_active_assistant(friendly_name)
-        self.send_messages(
-            [VoiceAssistantRequest(start=True, wake_word_phrase=wake_word_phrase)]
+        self._update_active_many(
+            [(self.state.active_assistant_entity, friendly_name)],
+            VoiceAssistantRequest(start=True, wake_word_phrase=wake_word_phrase),
         )
         self.duck()
         self._is_streaming_audio = True
@@ -452,8 +756,12 @@ class VoiceSatelliteProtocol(APIServer):
     def stop(self) -> None:
         self.state.active_wake_words.discard(self.state.stop_word.id)
         self.state.tts_player.stop()
-        self._update_active_tts("")
-        self._update_active_stt("")
+        self._update_active_many(
+            [
+                (self.state.active_tts_entity, ""),
+                (self.state.active_stt_entity, ""),
+            ]
+        )
 
         if self._timer_finished:
             self._timer_finished = False
@@ -482,12 +790,12 @@ class VoiceSatelliteProtocol(APIServer):
 
     def _tts_finished(self) -> None:
         self.state.active_wake_words.discard(self.state.stop_word.id)
-        self.send_messages([VoiceAssistantAnnounceFinished()])
+        self.send_messages([_ANNOUNCE_FINISHED])
 
         if self._continue_conversation:
             self.duck()
             self.state.tts_player.play(self.state.wakeup_sound)
-            self.send_messages([VoiceAssistantRequest(start=True)])
+            self.send_messages([_REQUEST_START])
             self._is_streaming_audio = True
             _LOGGER.debug("Continuing conversation")
         else:
@@ -506,9 +814,13 @@ class VoiceSatelliteProtocol(APIServer):
     def _clear_sensors(self) -> None:
         """Clear all text sensors."""
         _LOGGER.debug("Clearing sensors after delay")
-        self._update_active_tts("")
-        self._update_active_stt("")
-        self._update_active_assistant("")
+        self._update_active_many(
+            [
+                (self.state.active_tts_entity, ""),
+                (self.state.active_stt_entity, ""),
+                (self.state.active_assistant_entity, ""),
+            ]
+        )
 
     def _play_timer_finished(self) -> None:
         if not self._timer_finished:
@@ -517,59 +829,91 @@ class VoiceSatelliteProtocol(APIServer):
 
         self.state.tts_player.play(
             self.state.timer_finished_sound,
-            done_callback=lambda: call_all(
-                lambda: time.sleep(1.0), self._play_timer_finished
-            ),
+            done_callback=self._repeat_timer_finished,
+        )
+
+    def _repeat_timer_finished(self) -> None:
+        # Called from the player thread, so schedule the pause on the loop
+        assert self._loop is not None
+        self._loop.call_soon_threadsafe(
+            self._loop.call_later, _TIMER_REPEAT_DELAY, self._play_timer_finished
         )
 
     def connection_lost(self, exc):
         super().connection_lost(exc)
+        self._io_executor.submit(self._close_log)
+        self._io_executor.submit(self._close_ha_connection)
         _LOGGER.info("Disconnected from Home Assistant")
 
     def _update_active_tts(self, text: str) -> None:
-        if self.state.active_tts_entity is None:
-            return
-
-        _LOGGER.debug("Updating active_tts to: %r", text)
-        msg = self.state.active_tts_entity.update(text)
-        self.send_messages([msg])
+        self._update_active_many([(self.state.active_tts_entity, text)])
 
     def _update_active_stt(self, text: str) -> None:
-        if self.state.active_stt_entity is None:
-            return
+        self._update_active_many([(self.state.active_stt_entity, text)])
 
-        _LOGGER.debug("Updating active_stt to: %r", text)
-        msg = self.state.active_stt_entity.update(text)
-        self.send_messages([msg])
-
-    def _update_active_assistant(self, text: str) -> None:
-        if self.state.active_assistant_entity is None:
-            return
+    def _update_active_many(
+        self,
+        updates: Iterable[Tuple[Optional[TextAttributeEntity], str]],
+        *extra_msgs: OutgoingMessage,
+    ) -> None:
+        """Update text sensors, sending their states and extra_msgs in one write."""
+        msgs: List[OutgoingMessage] = []
+        for entity, text in updates:
+            if entity is None:
+                continue
+
+            if _LOGGER.isEnabledFor(logging.DEBUG):
+                _LOGGER.debug("Updating %s to: %r", entity.object_id, text)
+
+            if self._writelines is None:
+                # Nobody to send the state to
+                entity.set_silent(text)
+            else:
+                msgs.append(entity.update(text))
 
-        _LOGGER.debug("Updating active_assistant to: %r", text)
-        msg = self.state.active_assistant_entity.update(text)
-        self.send_messages([msg])
+        msgs.extend(extra_msgs)
+        self.send_messages(msgs)
 
     def _log_to_file(self, message: str) -> None:
         """Log a message to the unified lvas_log file with timestamp."""
+        timestamp = datetime.now().strftime("%Y_%m_%d %H:%M:%S")
+        log_entry = f"[{timestamp}] -- {message}\n"
+
+        with self._pending_log_lock:
+            self._pending_log.append(log_entry)
+            if len(self._pending_log) > 1:
+                # Flush is already queued
+                return
+
+        # Queued before any history sync, so the sync sees this entry
+        self._io_executor.submit(self._flush_log)
+
+    def _flush_log(self) -> None:
+        """Append pending log entries with a single write (I/O executor)."""
+        with self._pending_log_lock:
+            log_entries = self._pending_log
+            self._pending_log = []
+
         try:
-            # Use the symlink if available, otherwise construct the path
-            log_path = Path(__file__).parent.parent / "lvas_log"
-            if not log_path.exists():
-                log_path = Path("/dev/shm/lvas_log")
-            if not log_path.exists():
-                log_path = Path("/tmp/lvas_log")
-            
-            timestamp = datetime.now().strftime("%Y_%m_%d %H:%M:%S")
-            log_entry = f"[{timestamp}] -- {message}\n"
-            
-            with open(log_path, "a", encoding="utf-8") as f:
-                f.write(log_entry)
+            if self._log_fd is None:
+                self._log_fd = os.open(
+                    self._log_path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644
+                )
+
+            os.write(self._log_fd, "".join(log_entries).encode("utf-8"))
         except Exception as e:
             _LOGGER.warning("Failed to write to log file: %s", e)
 
+    def _close_log(self) -> None:
+        if self._log_fd is not None:
+            os.close(self._log_fd)
+            self._log_fd = None
+
     def _sync_history_to_ha(self) -> None:
-        """Sync last 100 lines of log to Home Assistant."""
+        """Sync last 100 lines of log to Home Assistant.
+
+        Blocks on HTTP, so it is run on the I/O executor.
+        """
         ha_url = self.state.global_preferences.ha_base_url
         ha_token = self.state.global_preferences.ha_token
         ha_entity = self.state.global_preferences.ha_history_entity or "input_text.lvas_history"
@@ -580,25 +924,16 @@ class VoiceSatelliteProtocol(APIServer):
         
         try:
             # Read last 100 lines from log
-            log_path = Path(__file__).parent.parent / "lvas_log"
-            if not log_path.exists():
-                log_path = Path("/dev/shm/lvas_log")
-            if not log_path.exists():
-                log_path = Path("/tmp/lvas_log")
-            
+            log_path = self._log_path
             if not log_path.exists():
                 _LOGGER.debug("Log file not found for HA sync")
                 return
             
-            with open(log_path, "r", encoding="utf-8") as f:
-                lines = f.readlines()
-            
-            # Get last 100 lines
-            history_lines = lines[-100:] if len(lines) > 100 else lines
-            history_text = "".join(history_lines)
+            # The log is shared by all instances, so read its tail from disk
+            history_lines = _read_tail(log_path, _HISTORY_LINES)
+            history_text = b"".join(history_lines).decode("utf-8", errors="replace")
             
             # Send to HA
-            url = f"{ha_url}/api/states/{ha_entity}"
             headers = {
                 "Authorization": f"Bearer {ha_token}",
                 "Content-Type": "application/json"
@@ -610,20 +945,62 @@ class VoiceSatelliteProtocol(APIServer):
             
             _LOGGER.debug("Syncing history to HA: %s (%d lines)", ha_entity, len(history_lines))
             
-            req = Request(
-                url,
-                data=json.dumps(data).encode('utf-8'),
-                headers=headers,
-                method='POST'
+            status = self._post_to_ha(
+                ha_url,
+                f"/api/states/{ha_entity}",
+                json.dumps(data).encode("utf-8"),
+                headers,
             )
-            with urlopen(req) as response:
-                if response.status == 200 or response.status == 201:
-                    _LOGGER.debug("History synced to HA successfully")
-                else:
-                    _LOGGER.warning("Failed to sync history to HA: status %s", response.status)
+            if status == 200 or status == 201:
+                _LOGGER.debug("History synced to HA successfully")
+            else:
+                _LOGGER.warning("Failed to sync history to HA: status %s", status)
         except Exception as e:
             _LOGGER.warning("Failed to sync history to HA: %s", e)
 
+    def _post_to_ha(
+        self, ha_url: str, path: str, body: bytes, headers: Dict[str, str]
+    ) -> int:
+        """POST over a kept-alive connection to Home Assistant; returns the status.
+
+        Only called on the I/O executor, which has a single thread.
+        """
+        if (self._ha_connection is None) or (self._ha_connection_url != ha_url):
+            self._close_ha_connection()
+            parsed_url = urlparse(ha_url)
+            connection_class = (
+                http.client.HTTPSConnection
+                if parsed_url.scheme == "https"
+                else http.client.HTTPConnection
+            )
+            self._ha_connection = connection_class(
+                parsed_url.netloc, timeout=_HA_SYNC_TIMEOUT
+            )
+            self._ha_connection_url = ha_url
+            self._ha_path_prefix = parsed_url.path.rstrip("/")
+
+        connection = self._ha_connection
+        url_path = self._ha_path_prefix + path
+        try:
+            connection.request("POST", url_path, body, headers)
+            response = connection.getresponse()
+        except (http.client.HTTPException, ConnectionError):
+            # Home Assistant may have closed the idle connection, so retry once
+            connection.close()
+            connection.request("POST", url_path, body, headers)
+            response = connection.getresponse()
+
+        # Drain the body so the connection can be reused
+        with response:
+            response.read()
+
+        return response.status
+
+    def _close_ha_connection(self) -> None:
+        if self._ha_connection is not None:
+            self._ha_connection.close()
+            self._ha_connection = None
+
     def _download_external_wake_word(
         self, external_wake_word: VoiceAssistantExternalWakeWord
     ) -> Optional[AvailableWakeWord]:
@@ -635,15 +1012,36 @@ class VoiceSatelliteProtocol(APIServer):
 
         # Check if we need to download the model file
         model_path = eww_dir / f"{external_wake_word.id}.tflite"
+        verified_path = eww_dir / f"{external_wake_word.id}.verified"
         should_download_model = True
         if model_path.exists():
-            model_size = model_path.stat().st_size
-            if model_size == external_wake_word.model_size:
-                with open(model_path, "rb") as model_file:
-                    model_hash = hashlib.sha256(model_file.read()).hexdigest()
+            model_stat = model_path.stat()
+            if model_stat.st_size == external_wake_word.model_size:
+                # Skip hashing if this exact file was already verified
+                verified_key = (
+                    f"{model_stat.st_size}:{int(model_stat.st_mtime)}:"
+                    f"{external_wake_word.model_hash}"
+                )
+                try:
+                    is_verified = verified_path.read_text() == verified_key
+                except OSError:
+                    is_verified = False
 
-                if model_hash == external_wake_word.model_hash:
+                if is_verified:
+                    should_download_model = False
+                    _LOGGER.debug(
+                        "Model for %s already verified. Skipping download.",
+                        external_wake_word.id,
+                    )
+                elif _sha256_file(model_path) == external_wake_word.model_hash:
                     should_download_model = False
+                    try:
+                        verified_path.write_text(verified_key)
+                    except OSError as e:
+                        # Only a cache: the model is re-hashed next time
+                        _LOGGER.debug(
+                            "Could not write %s: %s", verified_path, e
+                        )
                     _LOGGER.debug(
                         "Model size and hash match for %s. Skipping download.",
                         external_wake_word.id,
@@ -652,7 +1050,7 @@ class VoiceSatelliteProtocol(APIServer):
         if should_download_config or should_download_model:
             # Download config
             _LOGGER.debug("Downloading %s to %s", external_wake_word.url, config_path)
-            with urlopen(external_wake_word.url) as request:
+            with urlopen(_download_request(external_wake_word.url)) as request:
                 if request.status != 200:
                     _LOGGER.warning(
                         "Failed to download: %s, status=%s",
@@ -662,7 +1060,7 @@ class VoiceSatelliteProtocol(APIServer):
                     return None
 
                 with open(config_path, "wb") as model_file:
-                    shutil.copyfileobj(request, model_file)
+                    shutil.copyfileobj(request, model_file, _DOWNLOAD_CHUNK_SIZE)
 
         if should_download_model:
             # Download model file
@@ -673,7 +1071,7 @@ class VoiceSatelliteProtocol(APIServer):
             model_url = urlunparse(parsed_url)
 
             _LOGGER.debug("Downloading %s to %s", model_url, model_path)
-            with urlopen(model_url) as request:
+            with urlopen(_download_request(model_url)) as request:
                 if request.status != 200:
                     _LOGGER.warning(
                         "Failed to download: %s, status=%s", model_url, request.status
@@ -681,7 +1079,7 @@ class VoiceSatelliteProtocol(APIServer):
                     return None
 
                 with open(model_path, "wb") as model_file:
-                    shutil.copyfileobj(request, model_file)
+                    shutil.copyfileobj(request, model_file, _DOWNLOAD_CHUNK_SIZE)
 
         return AvailableWakeWord(
             id=external_wake_word.id,
@@ -1,109 +1,170 @@
 #!/usr/bin/env python3
+import asyncio
 import os
-import socket
-import subprocess
-import threading
-import time
+import re
 from pathlib import Path
 
+# orjson decodes journal entries considerably faster when it is installed
+try:
+    from orjson import loads as json_loads
+except ImportError:
+    from json import loads as json_loads
+
+# Per-event tracing, off unless LVA_DEBUG is set
+DEBUG = bool(os.environ.get("LVA_DEBUG"))
+
 def get_lva_service_names():
     user_dir = Path(__file__).parent.parent / "preferences" / "user"
+    # One directory read instead of a stat() per candidate service file
+    try:
+        with os.scandir(user_dir) as it:
+            entries = {entry.name for entry in it}
+    except FileNotFoundError:
+        return []
     service_names = []
-    for f in user_dir.glob("*_cli.json"):
-        if f.stem.endswith("_cli"):
-            name = f.stem[:-4]
-        else:
-            name = f.stem
-        service_file = user_dir / f"{name}.service"
-        if service_file.exists():
-            service_names.append(f"{name}.service")
+    for entry in entries:
+        if entry.endswith("_cli.json"):
+            service = f"{entry[:-len('_cli.json')]}.service"
+            if service in entries:
+                service_names.append(service)
     return service_names
 
 # Track mute state per service
 mute_states = {}
 
-def send_to_socket(cmd):
-    try:
-        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
-        sock.connect("/tmp/neopixel.sock")
-        sock.sendall(cmd.encode("utf-8"))
-        resp = sock.recv(1024)
-        sock.close()
-        print(f"[socket] {resp.decode('utf-8')}")
-    except Exception as e:
-        print(f"[socket] Error: {e}")
+# Event -> message fragments, in priority order: the first event whose fragment
+# appears in an entry's (lowercased) MESSAGE wins
+EVENTS = (
+    ("muted_wakeword", ("wake word detected while muted",)),
+    ("listening", ("detected wake word", "voice_assistant_stt_start")),
+    ("processing", ("voice_assistant_stt_end",)),
+    ("responding", ("playing http",)),
+    ("tts_finished", ("tts response finished",)),
+    ("mute_on", ("assistant mute changed: true",)),
+    ("mute_off", ("assistant mute changed: false",)),
+)
+
+# Cheap prefilter on the raw bytes, so only entries that might carry an event
+# get decoded
+EVENT_RE = re.compile(
+    b"|".join(
+        re.escape(fragment.encode("utf-8"))
+        for _, fragments in EVENTS
+        for fragment in fragments
+    ),
+    re.IGNORECASE,
+)
+
+def classify_message(message):
+    """Return the event a journal MESSAGE maps to, or None."""
+    message = message.lower()
+    for event, fragments in EVENTS:
+        if any(fragment in message for fragment in fragments):
+            return event
+    return None
 
-def follow_single_journal(svc):
-    """Follow a single journal in its own thread."""
-    cmd = ["journalctl", "--user", "-u", svc, "-f", "-n", "0"]
-    p = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+# Journal lines can be long; don't let one overflow the stream reader
+STREAM_LIMIT = 1024 * 1024
+
+async def socket_sender(queue):
+    """Forward queued commands to the pattern service over one connection."""
+    writer = None
+    while True:
+        cmd = await queue.get()
+        data = f"{cmd}\n".encode("utf-8")
+        for attempt in range(2):
+            try:
+                if writer is None or writer.is_closing():
+                    _, writer = await asyncio.open_unix_connection("/tmp/neopixel.sock")
+                writer.write(data)
+                await writer.drain()
+                if DEBUG:
+                    print(f"[socket] Sent {cmd}")
+                break
+            except Exception as e:
+                # Drop the stale connection and retry once with a fresh one
+                if writer is not None:
+                    writer.close()
+                writer = None
+                if attempt:
+                    print(f"[socket] Error: {e}")
+
+async def follow_service_journals(service_names, queue):
+    """Follow all service journals in one journalctl and queue the commands their events map to."""
+    cmd = ["journalctl", "--user", "-f", "-n", "0", "-o", "json"]
+    for svc in service_names:
+        cmd += ["-u", svc]
+    proc = await asyncio.create_subprocess_exec(
+        *cmd,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.DEVNULL,
+        limit=STREAM_LIMIT,
+    )
     
-    # Initialize mute state for this service
-    mute_states[svc] = False
+    # Initialize mute state for each service
+    for svc in service_names:
+        mute_states[svc] = False
     
     try:
-        while True:
-            line = p.stdout.readline()
-            if not line:
-                break
-            
-            l = line.lower()
-            # Filter and translate relevant events to simple commands
-            if "wake word detected while muted" in l:
-                send_to_socket("muted_wakeword")
-            elif "detected wake word" in l or "voice_assistant_stt_start" in l:
-                send_to_socket("listening")
-            elif "voice_assistant_stt_end" in l:
-                send_to_socket("processing")
-            elif "playing http" in l:
-                send_to_socket("responding")
-            elif "tts response finished" in l:
+        async for line in proc.stdout:
+            # Scan the raw entry first; only entries that may carry an event get decoded
+            if EVENT_RE.search(line) is None:
+                continue
+            try:
+                record = json_loads(line)
+            except ValueError:
+                continue
+            # Other fields (unit names, code locations) must not trigger events.
+            # MESSAGE is a list of bytes when it isn't valid UTF-8.
+            message = record.get("MESSAGE")
+            if not isinstance(message, str):
+                continue
+            event = classify_message(message)
+            if event is None:
+                continue
+            svc = record.get("_SYSTEMD_USER_UNIT")
+
+            # Translate relevant events to simple commands
+            if event == "tts_finished":
                 # Return to mute if still muted, otherwise idle
                 if mute_states.get(svc, False):
-                    send_to_socket("mute")
+                    queue.put_nowait("mute")
                 else:
-                    send_to_socket("idle")
-            elif "assistant mute changed: true" in l:
-                print(f"[debug] {svc}: Assistant mute changed: True. Sending 'mute' to neopixel.")
+                    queue.put_nowait("idle")
+            elif event == "mute_on":
+                if DEBUG:
+                    print(f"[debug] {svc}: Assistant mute changed: True. Sending 'mute' to neopixel.")
                 mute_states[svc] = True
-                send_to_socket("mute")
-            elif "assistant mute changed: false" in l:
-                print(f"[debug] {svc}: Assistant mute changed: False. Sending 'idle' to neopixel.")
+                queue.put_nowait("mute")
+            elif event == "mute_off":
+                if DEBUG:
+                    print(f"[debug] {svc}: Assistant mute changed: False. Sending 'idle' to neopixel.")
                 mute_states[svc] = False
-                send_to_socket("idle")
+                queue.put_nowait("idle")
+            else:
+                queue.put_nowait(event)
     except Exception as e:
-        print(f"[error] Thread for {svc} failed: {e}")
+        print(f"[error] Journal follower failed: {e}")
     finally:
-        p.terminate()
-        p.wait()
+        if proc.returncode is None:
+            proc.terminate()
+        await proc.wait()
 
-def follow_journals():
+async def follow_journals():
     service_names = get_lva_service_names()
     print("Following journals for:", service_names)
     
-    threads = []
-    for svc in service_names:
-        t = threading.Thread(target=follow_single_journal, args=(svc,), daemon=True)
-        t.start()
-        threads.append(t)
-    
-    try:
-        # Keep main thread alive
-        while True:
-            time.sleep(1)
-    except KeyboardInterrupt:
-        print("Stopping journal followers...")
-
-def main():
-    print("LVA monitor started. Ctrl+C to exit.")
-    follow_journals()
-
-if __name__ == "__main__":
-    main()
+    # One journalctl for every service; with no services it would follow everything
+    queue = asyncio.Queue()
+    followers = [follow_service_journals(service_names, queue)] if service_names else []
+    await asyncio.gather(socket_sender(queue), *followers)
 
 def main():
     print("LVA monitor started. Ctrl+C to exit.")
-    follow_journals()
+    try:
+        asyncio.run(follow_journals())
+    except KeyboardInterrupt:
+        print("Stopping journal followers...")
 
 if __name__ == "__main__":
     main()
@@ -1,11 +1,15 @@
+import selectors
 import socket
-import select
+import signal
 import os
 SOCKET_PATH = "/tmp/neopixel.sock"
+# Per-frame and per-command tracing, off unless LVA_DEBUG is set
+DEBUG = bool(os.environ.get("LVA_DEBUG"))
 import board
 import neopixel
 import time
 import threading
+from collections import namedtuple
 
 NUM_PIXELS = 8
 PIXEL_PIN = board.D18
@@ -20,113 +24,175 @@ COLOR_PRESETS = [
     (255, 0, 255),  # Magenta
 ]
 
-pixels = neopixel.NeoPixel(PIXEL_PIN, NUM_PIXELS, brightness=BRIGHTNESS, auto_write=True)
+pixels = neopixel.NeoPixel(PIXEL_PIN, NUM_PIXELS, brightness=BRIGHTNESS, auto_write=False)
 
-pattern_index = 0
-color_index = 0
+# What to show. Replaced as a whole, never mutated, so a pattern can tell the
+# state changed under it with one identity check.
+State = namedtuple("State", "pattern color")
+current_state = State(0, 0)
 brightness = BRIGHTNESS
 running = True
+server_socket = None
 
 # Volume bar state
 volume_display_active = False
 volume_display_end_time = 0
 last_volume = 0
-saved_pattern_index = 0
-saved_color_index = 0
+saved_state = current_state
 volume_bar_drawn = False
 
-def breathing(color):
-    print(f"[debug] Entered breathing with color={color}")
+# Serializes commands arriving on different client connections
+command_lock = threading.Lock()
+
+# Set whenever a command changes what should be shown, to cut animation waits short
+state_changed = threading.Event()
+
+def set_state(pattern, color):
+    # Keep the current object for an unchanged state so running patterns carry on
+    global current_state
+    state = State(pattern, color)
+    if state != current_state:
+        current_state = state
+
+def sleep_interruptible(seconds):
+    state_changed.wait(seconds)
+    state_changed.clear()
+
+def pace(deadline, interval):
+    """Wait until one frame interval past deadline and return the next deadline.
+
+    Sleeping a fixed interval after each frame drifts by however long the frame
+    took to draw; pacing against deadlines keeps a steady frame rate.
+    """
+    deadline += interval
+    slack = deadline - time.monotonic()
+    if slack > 0:
+        sleep_interruptible(slack)
+    elif slack < -interval:
+        # A whole frame behind: restart the cadence instead of rushing to catch up
+        deadline = time.monotonic()
+    return deadline
+
+# Brightness last applied to the buffer; setting it rescales every pixel
+shown_brightness = BRIGHTNESS
+
+def set_brightness(value):
+    global shown_brightness
+    if value != shown_brightness:
+        pixels.brightness = value
+        shown_brightness = value
+
+# Colors scaled by every brightness level 0-255, built once per color
+fade_tables = {}
+
+def fade_table(color):
+    table = fade_tables.get(color)
+    if table is None:
+        table = tuple(tuple(x * b // 255 for x in color) for b in range(256))
+        fade_tables[color] = table
+    return table
+
+# Build the preset tables at startup so switching patterns never pays for it
+for preset in COLOR_PRESETS:
+    fade_table(preset)
+
+def breathing(color, state):
+    if DEBUG:
+        print(f"[debug] Entered breathing with color={color}")
+    table = fade_table(color)
+    set_brightness(brightness)
+    min_level = int(255 * MIN_BREATHE_FACTOR)
+    deadline = time.monotonic()
     for b in list(range(0, 256, 4)) + list(range(255, -1, -4)):
-        if pattern_index != 0 or not running or color != COLOR_PRESETS[color_index]:
+        if current_state is not state or not running:
             return
-        factor = b / 255.0
-        if factor < MIN_BREATHE_FACTOR:
-            factor = MIN_BREATHE_FACTOR
-        c = tuple(int(x * factor) for x in color)
-        pixels.brightness = brightness
-        pixels.fill(c)
-        time.sleep(0.01)
-
-def pulsing(color):
-    print(f"[debug] Entered pulsing with color={color}")
+        pixels.fill(table[max(b, min_level)])
+        pixels.show()
+        deadline = pace(deadline, 0.01)
+
+def pulsing(color, state):
+    if DEBUG:
+        print(f"[debug] Entered pulsing with color={color}")
+    table = fade_table(color)
+    set_brightness(brightness)
+    deadline = time.monotonic()
     for _ in range(3):
-        if pattern_index != 1 or not running or color != COLOR_PRESETS[color_index]:
+        if current_state is not state or not running:
             return
         for b in range(0, 256, 8):
-            if pattern_index != 1 or not running or color != COLOR_PRESETS[color_index]:
+            if current_state is not state or not running:
                 return
-            c = tuple(int(x * (b / 255.0)) for x in color)
-            pixels.brightness = brightness
-            pixels.fill(c)
-            time.sleep(0.005)
+            pixels.fill(table[b])
+            pixels.show()
+            deadline = pace(deadline, 0.005)
         for b in range(255, -1, -8):
-            if pattern_index != 1 or not running or color != COLOR_PRESETS[color_index]:
+            if current_state is not state or not running:
                 return
-            c = tuple(int(x * (b / 255.0)) for x in color)
-            pixels.brightness = brightness
-            pixels.fill(c)
-            time.sleep(0.005)
-
-def cylon(color):
-    print(f"[debug] Entered cylon with color={color}")
-    fade_template = [0.2, 0.5, 1.0, 1.0, 0.5, 0.2]
+            pixels.fill(table[b])
+            pixels.show()
+            deadline = pace(deadline, 0.005)
+
+def cylon(color, state):
+    if DEBUG:
+        print(f"[debug] Entered cylon with color={color}")
+    table = fade_table(color)
+    set_brightness(brightness)
+    fade_template = [51, 127, 255, 255, 127, 51]  # 0.2, 0.5, 1.0 of full brightness
     fade_len = len(fade_template)
     center_range = range(2, NUM_PIXELS-2+1)
+    # Pad with the edge level so each eye position is a plain slice, no bounds checks
+    padded = [fade_template[0]] * NUM_PIXELS + fade_template + [fade_template[0]] * NUM_PIXELS
+    # The eye only has a few positions; build each frame once for all sweeps
+    frames = {}
+    for center in center_range:
+        start = NUM_PIXELS - center + (fade_len // 2)
+        frames[center] = [table[fade] for fade in padded[start:start + NUM_PIXELS]]
+    deadline = time.monotonic()
     for _ in range(3):
-        if pattern_index != 2 or not running or color != COLOR_PRESETS[color_index]:
+        if current_state is not state or not running:
             return
         for center in center_range[:-1]:
-            if pattern_index != 2 or not running or color != COLOR_PRESETS[color_index]:
+            if current_state is not state or not running:
                 return
-            pixels.brightness = brightness
-            for i in range(NUM_PIXELS):
-                fade_idx = i - center + (fade_len // 2)
-                if 0 <= fade_idx < fade_len:
-                    fade = fade_template[fade_idx]
-                else:
-                    fade = fade_template[0]
-                c = tuple(int(x * fade) for x in color)
-                pixels[i] = c
-            time.sleep(0.105)
+            pixels[:] = frames[center]
+            pixels.show()
+            deadline = pace(deadline, 0.105)
         for center in reversed(center_range[1:]):
-            if pattern_index != 2 or not running or color != COLOR_PRESETS[color_index]:
+            if current_state is not state or not running:
                 return
-            pixels.brightness = brightness
-            for i in range(NUM_PIXELS):
-                fade_idx = i - center + (fade_len // 2)
-                if 0 <= fade_idx < fade_len:
-                    fade = fade_template[fade_idx]
-                else:
-                    fade = fade_template[0]
-                c = tuple(int(x * fade) for x in color)
-                pixels[i] = c
-            time.sleep(0.105)
-
-def static(color):
-    print(f"[debug] Entered static with color={color}")
-    while running:
-        if pattern_index != 3 or not running or color != COLOR_PRESETS[color_index]:
-            return
-        pixels.brightness = brightness
-        pixels.fill(color)
-        time.sleep(0.05)
+            pixels[:] = frames[center]
+            pixels.show()
+            deadline = pace(deadline, 0.105)
+
+def static(color, state):
+    if DEBUG:
+        print(f"[debug] Entered static with color={color}")
+    set_brightness(brightness)
+    pixels.fill(color)
+    pixels.show()
+    # The frame never changes, so sleep until a command or shutdown changes the state
+    while running and current_state is state:
+        sleep_interruptible(None)
 
-def ripple(color):
-    print(f"[debug] Entered ripple with color={color}")
+def ripple(color, state):
+    if DEBUG:
+        print(f"[debug] Entered ripple with color={color}")
+    table = fade_table(color)
+    set_brightness(brightness)
+    # Brightness by distance behind the head; pixels up to the head fade out
+    # behind it and the rest stay dark, so every frame is known up front
+    gradient = [table[255 * (NUM_PIXELS - j) // NUM_PIXELS] for j in range(NUM_PIXELS)]
+    frames = [gradient[i::-1] + [(0, 0, 0)] * (NUM_PIXELS - 1 - i) for i in range(NUM_PIXELS)]
+    deadline = time.monotonic()
     for _ in range(3):
-        if pattern_index != 4 or not running or color != COLOR_PRESETS[color_index]:
+        if current_state is not state or not running:
             return
         for i in range(NUM_PIXELS):
-            if pattern_index != 4 or not running or color != COLOR_PRESETS[color_index]:
+            if current_state is not state or not running:
                 return
-            pixels.brightness = brightness
-            pixels.fill((0, 0, 0))
-            for j in range(i + 1):
-                fade = 1 - (j / NUM_PIXELS)
-                c = tuple(int(x * fade) for x in color)
-                pixels[i - j] = c
-            time.sleep(0.07)
+            pixels[:] = frames[i]
+            pixels.show()
+            deadline = pace(deadline, 0.07)
 
 def volume_bar(volume_percent):
     """Display volume as a bar (filled LEDs from 0-100%).
@@ -142,126 +208,247 @@ def volume_bar(volume_percent):
     
     # Fill LEDs from left to right based on volume, respecting global brightness
     global brightness
-    pixels.brightness = brightness
+    set_brightness(brightness)
     pixels.fill((0, 0, 0))  # Clear first
     for i in range(num_lit):
         pixels[i] = color
     pixels.show()
 
-def mute_collapse():
+def mute_collapse(state):
     """Outer pixels travel inward and dim, ending with just center two LEDs dimly lit."""
-    print(f"[debug] Entered mute_collapse")
+    if DEBUG:
+        print(f"[debug] Entered mute_collapse")
     color = (255, 0, 0)  # Red
     very_dim_factor = 0.1
     
     # Animation: pairs travel inward and dim
     # Pairs: (0,7), (1,6), (2,5) -> finally just (3,4)
     pairs = [(0, 7), (1, 6), (2, 5)]
+    frame = pixels[:]
     
+    deadline = time.monotonic()
     for pair_idx, (left, right) in enumerate(pairs):
-        if pattern_index != 5 or not running:
+        if current_state is not state or not running:
             return
         
         # All pixels very dim
         very_dim_color = tuple(int(x * very_dim_factor) for x in color)
         
-        pixels.brightness = brightness
-        pixels[left] = very_dim_color
-        pixels[right] = very_dim_color
+        set_brightness(brightness)
+        frame[left] = very_dim_color
+        frame[right] = very_dim_color
+        pixels[:] = frame
         pixels.show()
-        time.sleep(0.15)
+        deadline = pace(deadline, 0.15)
     
     # Final state: just center two pixels very dim
     very_dim_color = tuple(int(x * very_dim_factor) for x in color)
-    pixels.fill((0, 0, 0))
-    pixels.brightness = brightness
-    pixels[3] = very_dim_color
-    pixels[4] = very_dim_color
+    set_brightness(brightness)
+    pixels[:] = [very_dim_color if i in (3, 4) else (0, 0, 0) for i in range(NUM_PIXELS)]
     pixels.show()
 
-def mute_idle():
+def mute_idle(state):
     """Hold the mute state with just center two pixels dimly lit."""
-    print(f"[debug] Entered mute_idle")
+    if DEBUG:
+        print(f"[debug] Entered mute_idle")
     color = (255, 0, 0)  # Red
     very_dim_factor = 0.1
     very_dim_color = tuple(int(x * very_dim_factor) for x in color)
+    frame = [very_dim_color if i in (3, 4) else (0, 0, 0) for i in range(NUM_PIXELS)]
     
-    while running and pattern_index == 6:
-        pixels.brightness = brightness
-        pixels.fill((0, 0, 0))
-        pixels[3] = very_dim_color
-        pixels[4] = very_dim_color
-        pixels.show()
-        time.sleep(0.05)
+    set_brightness(brightness)
+    pixels[:] = frame
+    pixels.show()
+    while running and current_state is state:
+        sleep_interruptible(None)
 
+# Patterns drawn in the selected preset color, indexed by State.pattern
+COLOR_PATTERNS = (breathing, pulsing, cylon, static, ripple)
 
 def pattern_runner():
-    global pattern_index, color_index, running
+    global current_state, running
     global brightness
     global volume_display_active, volume_display_end_time, last_volume
-    global saved_pattern_index, saved_color_index, volume_bar_drawn
-    last_pat = last_col = None
+    global saved_state, volume_bar_drawn
+    last_state = None
     while running:
         # Check if volume display timer expired
         if volume_display_active and time.time() >= volume_display_end_time:
-            volume_display_active = False
-            volume_bar_drawn = False
-            pattern_index = saved_pattern_index
-            color_index = saved_color_index
-            print(f"[debug] Volume display timeout - returning to pattern {pattern_index}")
+            with command_lock:
+                volume_display_active = False
+                volume_bar_drawn = False
+                current_state = saved_state
+            if DEBUG:
+                print(f"[debug] Volume display timeout - returning to pattern {current_state.pattern}")
         
         # If volume display is active, show it once then just wait
         if volume_display_active:
             if not volume_bar_drawn:
                 volume_bar(last_volume)
                 volume_bar_drawn = True
-            time.sleep(0.05)
+            sleep_interruptible(0.05)
             continue
         
-        color = COLOR_PRESETS[color_index]
-        pixels.brightness = brightness
-        pat_idx = pattern_index
-        if pat_idx != last_pat or color_index != last_col:
-            print(f"[debug] pattern_runner: pattern_index={pat_idx}, color_index={color_index}, color={color}")
-            last_pat, last_col = pat_idx, color_index
-        if pat_idx == 0:
-            print("[debug] Calling breathing")
-            breathing(color)
-        elif pat_idx == 1:
-            print("[debug] Calling pulsing")
-            pulsing(color)
-        elif pat_idx == 2:
-            print("[debug] Calling cylon")
-            cylon(color)
-        elif pat_idx == 3:
-            print("[debug] Calling static")
-            static(color)
-        elif pat_idx == 4:
-            print("[debug] Calling ripple")
-            ripple(color)
-        elif pat_idx == 5:
-            print("[debug] Calling mute_collapse")
-            mute_collapse()
-            # After animation, switch to idle state
-            pattern_index = 6
-        elif pat_idx == 6:
-            print("[debug] Calling mute_idle")
-            mute_idle()
+        state = current_state
+        color = COLOR_PRESETS[state.color]
+        set_brightness(brightness)
+        if state != last_state:
+            if DEBUG:
+                print(f"[debug] pattern_runner: pattern={state.pattern}, color_index={state.color}, color={color}")
+            last_state = state
+        pattern = COLOR_PATTERNS[state.pattern] if 0 <= state.pattern < len(COLOR_PATTERNS) else None
+        if pattern is not None:
+            if DEBUG:
+                print(f"[debug] Calling {pattern.__name__}")
+            pattern(color, state)
+        elif state.pattern == 5:
+            if DEBUG:
+                print("[debug] Calling mute_collapse")
+            mute_collapse(state)
+            # After animation, switch to idle state unless a command already moved on
+            with command_lock:
+                if current_state is state:
+                    set_state(6, state.color)
+        elif state.pattern == 6:
+            if DEBUG:
+                print("[debug] Calling mute_idle")
+            mute_idle(state)
         else:
-            print("[debug] pattern_index is off/unknown, turning off LEDs")
+            if DEBUG:
+                print("[debug] pattern is off/unknown, turning off LEDs")
             pixels.fill((0, 0, 0))
-            time.sleep(0.1)
+            pixels.show()
+            # Nothing to animate; sleep until a command or shutdown changes the state
+            sleep_interruptible(None)
+
+# Commands that switch to a fixed state: (pattern, color index or None to keep it)
+COMMAND_STATES = {
+    "on": (0, 2),                 # blue breathing
+    "mute": (5, None),            # mute collapse
+    "muted_wakeword": (5, None),  # replay the collapse animation
+    "error": (1, 0),              # red pulsing
+    "off": (-1, None),
+    "listening": (0, 3),          # yellow breathing
+    "processing": (2, 4),         # magenta cylon
+    "responding": (0, 1),         # green breathing
+    "idle": (-1, None),
+}
+
+def show_volume(args):
+    # Format: "volume 50" for 50%
+    global volume_display_active, volume_display_end_time, last_volume
+    global saved_state, volume_bar_drawn
+    try:
+        vol = int(args[0])
+        # Save current pattern if not already in volume display mode
+        if not volume_display_active:
+            saved_state = current_state
+        last_volume = vol
+        volume_display_active = True
+        volume_bar_drawn = False  # Force redraw
+        volume_display_end_time = time.time() + 1.0  # Show for 1 second
+        if DEBUG:
+            print(f"[debug] socket_listener set volume bar to {vol}% (will timeout at {volume_display_end_time})")
+    except Exception as e:
+        print(f"[debug] Error parsing volume command: {e}")
+
+def select_preset(args):
+    try:
+        set_state(current_state.pattern, int(args[0]))
+    except Exception:
+        pass
+
+# Commands that take arguments, keyed on their first word
+ARG_COMMANDS = {
+    "volume": show_volume,
+    "preset": select_preset,
+}
+
+def handle_command(cmd):
+    if DEBUG:
+        print(f"[patterns] Received command: {cmd}")
+    entry = COMMAND_STATES.get(cmd)
+    if entry is not None:
+        pattern, color = entry
+        set_state(pattern, current_state.color if color is None else color)
+        if pattern == -1:
+            pixels.fill((0,0,0))
+            pixels.show()
+        if DEBUG:
+            print(f"[debug] socket_listener set {current_state} ({cmd})")
+        return
+    name, *args = cmd.split()
+    handler = ARG_COMMANDS.get(name)
+    if handler is not None:
+        handler(args)
+
+# Fixed-state commands within this window collapse into the last one, so a burst
+# like "detected wake word" + "stt_start" only restarts the animation once
+DEBOUNCE_SECONDS = 0.02
+
+# Latest fixed-state command waiting out the debounce window
+pending_command = None
+command_pending = threading.Event()
+
+def flush_pending_command():
+    # Caller holds command_lock
+    global pending_command
+    cmd, pending_command = pending_command, None
+    command_pending.clear()
+    if cmd is not None:
+        handle_command(cmd)
+
+def submit_command(cmd):
+    global pending_command
+    with command_lock:
+        if cmd in COMMAND_STATES and cmd != "muted_wakeword":
+            pending_command = cmd
+            command_pending.set()
+            return
+        # Muted wake words and argument commands apply at once, after anything pending
+        flush_pending_command()
+        handle_command(cmd)
+    state_changed.set()
+
+def debouncer():
+    while running:
+        command_pending.wait()
+        time.sleep(DEBOUNCE_SECONDS)
+        with command_lock:
+            flush_pending_command()
+        state_changed.set()
+
+def submit_lines(data):
+    for line in data.split(b"\n"):
+        cmd = line.decode("utf-8").strip().lower()
+        if cmd:
+            submit_command(cmd)
+
+def read_client(conn, selector, buffers):
+    """Dispatch the complete commands a client sent; keep any partial line for later."""
+    try:
+        data = conn.recv(4096)
+    except OSError:
+        data = b""
+    if not data:
+        selector.unregister(conn)
+        conn.close()
+        # A client may close without terminating its last command
+        submit_lines(buffers.pop(conn))
+        return
+    data = buffers[conn] + data
+    end = data.rfind(b"\n") + 1
+    buffers[conn] = data[end:]
+    if end:
+        submit_lines(data[:end])
 
 def main():
     # Set default to 'on' preset: blue breathing
-    global pattern_index, color_index, running
-    pattern_index = 0  # breathing
-    color_index = 2    # blue
+    global current_state, running
+    current_state = State(0, 2)  # blue breathing
 
     def socket_listener():
-        global pattern_index, color_index
-        global volume_display_active, volume_display_end_time, last_volume
-        global saved_pattern_index, saved_color_index, volume_bar_drawn
+        global server_socket
         import traceback
         try:
             if os.path.exists(SOCKET_PATH):
@@ -269,77 +456,31 @@ def main():
             server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
             server.bind(SOCKET_PATH)
             os.chmod(SOCKET_PATH, 0o666)
-            server.listen(1)
+            server.listen(8)
+            server_socket = server
             print(f"[patterns] Listening on {SOCKET_PATH}")
+            # Clients keep their connection open; serve them all from one selector
+            selector = selectors.DefaultSelector()
+            selector.register(server, selectors.EVENT_READ)
+            buffers = {}
             while running:
-                rlist, _, _ = select.select([server], [], [], 0.5)
-                if server in rlist:
-                    conn, _ = server.accept()
-                    with conn:
-                        data = conn.recv(1024)
-                        if not data:
-                            continue
-                        cmd = data.decode("utf-8").strip().lower()
-                        print(f"[patterns] Received command: {cmd}")
-                        # Handle commands
-                        if cmd == "on":
-                            pattern_index = 0  # breathing
-                            color_index = 2    # blue (COLOR_PRESETS[2])
-                            print(f"[debug] socket_listener set pattern_index=0 (on), color_index=2 (blue)")
-                        elif cmd == "mute":
-                            pattern_index = 5  # mute_collapse animation
-                            print(f"[debug] socket_listener set pattern_index=5 (mute collapse)")
-                        elif cmd == "muted_wakeword":
-                            # Replay the collapse animation
-                            pattern_index = 5  # mute_collapse animation
-                            print(f"[debug] socket_listener set pattern_index=5 (muted wakeword detected)")
-                        elif cmd == "error":
-                            pattern_index = 1  # pulsing
-                            color_index = 0    # red (COLOR_PRESETS[0])
-                            print(f"[debug] socket_listener set pattern_index=1 (error), color_index=0 (red)")
-                        elif cmd == "off":
-                            pattern_index = -1
-                            pixels.fill((0,0,0))
-                            pixels.show()
-                            print(f"[debug] socket_listener set pattern_index=-1 (off)")
-                        elif cmd == "listening":
-                            pattern_index = 0  # breathing
-                            color_index = 3    # yellow (COLOR_PRESETS[3])
-                            print(f"[debug] socket_listener set pattern_index=0 (listening), color_index=3 (yellow)")
-                        elif cmd == "processing":
-                            pattern_index = 2  # cylon
-                            color_index = 4    # magenta (purple, COLOR_PRESETS[4])
-                            print(f"[debug] socket_listener set pattern_index=2 (processing), color_index=4 (magenta)")
-                        elif cmd == "responding":
-                            pattern_index = 0  # breathing
-                            color_index = 1    # green (COLOR_PRESETS[1])
-                            print(f"[debug] socket_listener set pattern_index=0 (responding), color_index=1 (green)")
-                        elif cmd == "idle":
-                            pattern_index = -1
-                            pixels.fill((0,0,0))
-                            pixels.show()
-                            print(f"[debug] socket_listener set pattern_index=-1 (idle)")
-                        elif cmd.startswith("volume"):
-                            # Format: "volume 50" for 50%
-                            try:
-                                vol = int(cmd.split()[1])
-                                # Save current pattern if not already in volume display mode
-                                if not volume_display_active:
-                                    saved_pattern_index = pattern_index
-                                    saved_color_index = color_index
-                                last_volume = vol
-                                volume_display_active = True
-                                volume_bar_drawn = False  # Force redraw
-                                volume_display_end_time = time.time() + 1.0  # Show for 1 second
-                                print(f"[debug] socket_listener set volume bar to {vol}% (will timeout at {volume_display_end_time})")
-                            except Exception as e:
-                                print(f"[debug] Error parsing volume command: {e}")
-                        elif cmd.startswith("preset"):
-                            try:
-                                idx = int(cmd.split()[1])
-                                color_index = idx
-                            except Exception:
-                                pass
+                for key, _ in selector.select():
+                    if key.fileobj is not server:
+                        try:
+                            read_client(key.fileobj, selector, buffers)
+                        except Exception as e:
+                            print(f"[patterns] Exception in connection handler: {e}")
+                        continue
+                    try:
+                        conn, _ = server.accept()
+                    except OSError:
+                        # shutdown() from the signal handler wakes the selector
+                        if not running:
+                            break
+                        raise
+                    selector.register(conn, selectors.EVENT_READ)
+                    buffers[conn] = b""
+            selector.close()
             server.close()
             if os.path.exists(SOCKET_PATH):
                 os.remove(SOCKET_PATH)
@@ -347,14 +488,30 @@ def main():
             print(f"[patterns] Exception in socket_listener: {e}")
             traceback.print_exc()
 
+    def request_shutdown(signum, frame):
+        global running
+        running = False
+        state_changed.set()
+        command_pending.set()
+        if server_socket is not None:
+            try:
+                server_socket.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+
+    signal.signal(signal.SIGTERM, request_shutdown)
+    signal.signal(signal.SIGINT, request_shutdown)
+
     t_sock = threading.Thread(target=socket_listener, daemon=True)
     t_sock.start()
+    threading.Thread(target=debouncer, daemon=True).start()
     print("NeoPixel pattern service started. Ctrl+C to exit.")
     t_pattern = threading.Thread(target=pattern_runner)
     t_pattern.start()
     t_pattern.join()
     running = False
     pixels.fill((0, 0, 0))
+    pixels.show()
     print("All LEDs off.")
 
 if __name__ == "__main__":
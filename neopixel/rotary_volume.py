@@ -1,14 +1,19 @@
 #!/usr/bin/env python3
 """Rotary encoder volume control for default PulseAudio sink."""
 
+import signal
+import socket
 import subprocess
 import threading
 import time
 import sys
 import logging
 import os
+import pwd
+import re
 from pathlib import Path
-from queue import Queue
+from queue import Empty, Queue
+from typing import List, Optional
 
 # Setup logging
 log_file = Path("/tmp/rotary_volume.log")
@@ -46,27 +51,48 @@ SW = 27   # Switch/button for mute
 VOLUME_STEP = 2  # Percentage per rotation step
 DEBOUNCE_TIME = 0.2  # Seconds
 NEOPIXEL_SOCKET = "/tmp/neopixel.sock"
+SHARED_MUTE_PATH = "/dev/shm/lvas_system_mute"
+MUTE_FILE_OWNER = "stef"  # User the satellite runs as
+BURST_WINDOW = 0.02  # Seconds of steps after the first one that are applied together
+SINK_INPUTS_TTL = 2.0  # Seconds to reuse the default sink's stream list between knob steps
+
+# pactl get-sink-volume percentage, as in "/  75% /"
+VOLUME_RE = re.compile(r"/\s+(\d+)%")
+
+# pactl subscribe line, as in "Event 'new' on sink-input #42"
+SINK_EVENT_RE = re.compile(r"Event '(\w+)' on ([\w-]+) #")
 
 # Simple step-based control (no LED quantization here)
 
-clk_last_state = None
 rotary_lock = threading.Lock()
 running = True
 volume_queue = Queue()  # Queue for volume changes
 software_mute = False  # Track mute state (like the main satellite script does)
+neopixel_sock: Optional[socket.socket] = None  # Persistent connection to the neopixel service
+sink_inputs: List[str] = []  # Streams on the default sink, as of sink_inputs_time
+sink_inputs_time: Optional[float] = None
+sink_inputs_generation = 0  # Bumped on every invalidation
+sink_inputs_lock = threading.Lock()
+sink_events_proc: Optional[subprocess.Popen] = None
 
 
 def send_neopixel_command(cmd: str) -> None:
-    """Send command to neopixel socket."""
-    try:
-        import socket
-        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
-        sock.connect(NEOPIXEL_SOCKET)
-        sock.sendall(cmd.encode("utf-8"))
-        sock.close()
-    except Exception as e:
-        # Silently fail - neopixel service might not be running
-        pass
+    """Send command to neopixel socket, reusing one connection across commands."""
+    global neopixel_sock
+    data = f"{cmd}\n".encode("utf-8")
+    for _ in range(2):
+        try:
+            if neopixel_sock is None:
+                neopixel_sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+                neopixel_sock.connect(NEOPIXEL_SOCKET)
+            neopixel_sock.sendall(data)
+            return
+        except OSError:
+            # Drop the stale connection and retry once with a fresh one
+            if neopixel_sock is not None:
+                neopixel_sock.close()
+            neopixel_sock = None
+    # Silently give up - neopixel service might not be running
 
 
 
@@ -77,28 +103,23 @@ def toggle_mute() -> None:
     software_mute = not software_mute
     
     # Write to the shared mute file so the main satellite script respects it
-    shared_mute_path = "/dev/shm/lvas_system_mute"
     mute_content = "on" if software_mute else "off"
     
     try:
-        # Use tee to write as the file's owner (stef) to avoid permission issues
-        subprocess.run(
-            ["sudo", "-u", "stef", "tee", shared_mute_path],
-            input=mute_content,
-            text=True,
-            capture_output=True,
-            check=True,
-        )
-        
-        # Read back from file to verify what was actually written
-        file_state = subprocess.run(
-            ["cat", shared_mute_path],
-            capture_output=True,
-            text=True,
-            check=True,
-        ).stdout.strip()
+        # Write then rename so pollers never see an empty (unmuted) file
+        temp_path = f"{SHARED_MUTE_PATH}.tmp"
+        fd = os.open(temp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o664)
+        try:
+            if os.geteuid() == 0:
+                # Keep the file owned by the satellite's user, as writing via sudo -u did
+                owner = pwd.getpwnam(MUTE_FILE_OWNER)
+                os.fchown(fd, owner.pw_uid, owner.pw_gid)
+            os.write(fd, mute_content.encode("utf-8"))
+        finally:
+            os.close(fd)
+        os.replace(temp_path, SHARED_MUTE_PATH)
         
-        logger.info(f"Wrote mute state to {shared_mute_path}: {mute_content} (file now reads: {file_state})")
+        logger.info(f"Wrote mute state to {SHARED_MUTE_PATH}: {mute_content}")
     except Exception as e:
         logger.error(f"Failed to write mute state: {e}")
     
@@ -119,9 +140,7 @@ def get_volume() -> int:
             env=PACTL_ENV,
         )
         # Output like: "Volume: front-left: 49043 /  75% / -7.55 dB,   front-right: 49043 /  75% / -7.55 dB"
-        # Look for pattern like "/ 75% /"
-        import re
-        match = re.search(r'/\s+(\d+)%', result.stdout)
+        match = VOLUME_RE.search(result.stdout)
         if match:
             vol = int(match.group(1))
             return vol
@@ -135,6 +154,96 @@ def get_volume() -> int:
         return 0
 
 
+def invalidate_sink_inputs() -> None:
+    """Force the next get_default_sink_input_ids() call to rescan."""
+    global sink_inputs_time, sink_inputs_generation
+    with sink_inputs_lock:
+        sink_inputs_time = None
+        sink_inputs_generation += 1
+
+
+def get_default_sink_input_ids() -> List[str]:
+    """Get ids of the streams playing on the default sink.
+
+    The result is reused for up to SINK_INPUTS_TTL, or until sink_event_listener()
+    sees a stream or default sink change. The TTL also catches streams moved
+    between sinks, whose 'change' events look like our own volume writes.
+    """
+    global sink_inputs, sink_inputs_time
+    now = time.monotonic()
+    with sink_inputs_lock:
+        if sink_inputs_time is not None and now - sink_inputs_time < SINK_INPUTS_TTL:
+            return sink_inputs
+        generation = sink_inputs_generation
+
+    input_ids: List[str] = []
+    try:
+        def_sink_name = subprocess.run(
+            ["pactl", "get-default-sink"], capture_output=True, text=True, env=PACTL_ENV
+        ).stdout.strip()
+        sinks_short = subprocess.run(
+            ["pactl", "list", "sinks", "short"], capture_output=True, text=True, env=PACTL_ENV
+        ).stdout.strip().splitlines()
+        def_sink_index = None
+        for line in sinks_short:
+            parts = line.split()
+            if len(parts) >= 2 and parts[1] == def_sink_name:
+                def_sink_index = parts[0]
+                break
+        if def_sink_index is not None:
+            inputs_short = subprocess.run(
+                ["pactl", "list", "sink-inputs", "short"], capture_output=True, text=True, env=PACTL_ENV
+            ).stdout.strip().splitlines()
+            for line in inputs_short:
+                parts = line.split()
+                if len(parts) >= 2:
+                    input_id, sink_id = parts[0], parts[1]
+                    if sink_id == def_sink_index:
+                        input_ids.append(input_id)
+    except Exception:
+        return []
+
+    with sink_inputs_lock:
+        # Don't cache a scan that an event has already made stale
+        if generation == sink_inputs_generation:
+            sink_inputs = input_ids
+            sink_inputs_time = now
+    return input_ids
+
+
+def sink_event_listener() -> None:
+    """Invalidate the cached stream list when PulseAudio reports a relevant change."""
+    global sink_events_proc
+    while running:
+        try:
+            sink_events_proc = subprocess.Popen(
+                ["pactl", "subscribe"],
+                stdout=subprocess.PIPE,
+                stderr=subprocess.DEVNULL,
+                text=True,
+                env=PACTL_ENV,
+            )
+        except OSError as e:
+            logger.error(f"Could not subscribe to PulseAudio events: {e}")
+            return
+
+        # Anything may have changed while we weren't subscribed
+        invalidate_sink_inputs()
+        for line in sink_events_proc.stdout:
+            match = SINK_EVENT_RE.match(line)
+            if match is None:
+                continue
+            event, facility = match.groups()
+            # Our own volume changes show up as 'change' events, so those are
+            # ignored; streams moved between sinks are picked up by the TTL
+            if facility == "server" or (facility in ("sink", "sink-input") and event != "change"):
+                invalidate_sink_inputs()
+
+        sink_events_proc.wait()
+        if running:
+            time.sleep(1)  # Don't respawn in a tight loop if pactl keeps exiting
+
+
 def set_volume(volume: int) -> None:
     """Set volume of default sink (0-100)."""
     volume = max(0, min(100, volume))  # Clamp to 0-100
@@ -146,47 +255,20 @@ def set_volume(volume: int) -> None:
             check=True,
             env=PACTL_ENV,
         )
-        # Verify it was set
-        verify = subprocess.run(
-            ["pactl", "get-sink-volume", "@DEFAULT_SINK@"],
-            capture_output=True,
-            text=True,
-            env=PACTL_ENV,
-        )
-        logger.info(f"Volume set to: {volume}% - Verify: {verify.stdout.strip()[:80]}")
+        logger.info(f"Volume set to: {volume}%")
 
         # Also adjust active stream volumes on the default sink for audible change
-        try:
-            def_sink_name = subprocess.run(
-                ["pactl", "get-default-sink"], capture_output=True, text=True, env=PACTL_ENV
-            ).stdout.strip()
-            sinks_short = subprocess.run(
-                ["pactl", "list", "sinks", "short"], capture_output=True, text=True, env=PACTL_ENV
-            ).stdout.strip().splitlines()
-            def_sink_index = None
-            for line in sinks_short:
-                parts = line.split()
-                if len(parts) >= 2 and parts[1] == def_sink_name:
-                    def_sink_index = parts[0]
-                    break
-            if def_sink_index is not None:
-                inputs_short = subprocess.run(
-                    ["pactl", "list", "sink-inputs", "short"], capture_output=True, text=True, env=PACTL_ENV
-                ).stdout.strip().splitlines()
-                for line in inputs_short:
-                    parts = line.split()
-                    if len(parts) >= 2:
-                        input_id, sink_id = parts[0], parts[1]
-                        if sink_id == def_sink_index:
-                            subprocess.run(
-                                ["pactl", "set-sink-input-volume", input_id, f"{volume}%"],
-                                capture_output=True,
-                                text=True,
-                                env=PACTL_ENV,
-                                check=False,
-                            )
-        except Exception as e:
-            pass
+        for input_id in get_default_sink_input_ids():
+            result = subprocess.run(
+                ["pactl", "set-sink-input-volume", input_id, f"{volume}%"],
+                capture_output=True,
+                text=True,
+                env=PACTL_ENV,
+                check=False,
+            )
+            if result.returncode != 0:
+                # The stream went away; rescan on the next step
+                invalidate_sink_inputs()
         # Update neopixel visualization
         send_neopixel_command(f"volume {volume}")
     except subprocess.CalledProcessError as e:
@@ -199,74 +281,75 @@ def volume_worker() -> None:
     """Worker thread to process volume deltas queued by rotary edges."""
     global running
     current_volume = get_volume()
-    pending_delta = 0
 
     while running:
+        # Sleep until the knob moves, then gather the rest of the burst
+        delta = volume_queue.get()
+        if delta is None:
+            break
+        pending_delta = delta
+        stop = False
+        deadline = time.monotonic() + BURST_WINDOW
         try:
-            # Collect deltas quickly to batch rapid rotations
-            delta = volume_queue.get(timeout=0.01)
-            if delta is None:
-                break
-            pending_delta += delta
-            while not volume_queue.empty():
-                d = volume_queue.get_nowait()
-                if d is not None:
-                    pending_delta += d
-
-            # Apply accumulated delta to current volume
-            if pending_delta != 0:
+            while True:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                d = volume_queue.get(timeout=remaining)
+                if d is None:
+                    stop = True
+                    break
+                pending_delta += d
+        except Empty:
+            pass
+
+        # Apply accumulated delta to current volume
+        if pending_delta != 0:
+            try:
                 current_volume = max(0, min(100, current_volume + pending_delta))
                 set_volume(current_volume)
-                pending_delta = 0
-        except Exception:
-            continue
+            except Exception as e:
+                # Keep the worker alive so the knob still works afterwards
+                logger.error(f"Error in volume worker: {e}")
+        if stop:
+            break
+
+
+def on_clk_falling(channel: int) -> None:
+    """Queue one volume step for a falling CLK edge; DT gives the direction."""
+    if GPIO.input(DT):
+        # Clockwise - increase volume by step
+        volume_queue.put(VOLUME_STEP)
+    else:
+        # Counter-clockwise - decrease volume by step
+        volume_queue.put(-VOLUME_STEP)
+
+
+def on_sw_falling(channel: int) -> None:
+    """Toggle mute on a button press; bouncetime already debounces it."""
+    logger.info("DEBUG: Button press detected, calling toggle_mute()")
+    toggle_mute()
 
 
 def rotary_listener() -> None:
     """Listen to rotary encoder and adjust volume."""
-    global clk_last_state, running
+    global running
 
     GPIO.setmode(GPIO.BCM)
     GPIO.setup(CLK, GPIO.IN, pull_up_down=GPIO.PUD_UP)
     GPIO.setup(DT, GPIO.IN, pull_up_down=GPIO.PUD_UP)
     GPIO.setup(SW, GPIO.IN, pull_up_down=GPIO.PUD_UP)
 
-    clk_last_state = GPIO.input(CLK)
-    sw_last_state = GPIO.input(SW)
-    last_sw_press_time = 0
+    # Edge interrupts instead of polling the pins every millisecond
+    GPIO.add_event_detect(CLK, GPIO.FALLING, callback=on_clk_falling, bouncetime=1)
+    GPIO.add_event_detect(
+        SW, GPIO.FALLING, callback=on_sw_falling, bouncetime=int(DEBOUNCE_TIME * 1000)
+    )
     logger.info("Rotary encoder volume control active. Rotate to adjust volume, press button to toggle mute.")
 
     try:
         while running:
-            clk_state = GPIO.input(CLK)
-            dt_state = GPIO.input(DT)
-            sw_state = GPIO.input(SW)
-
-            # Detect rotation on falling edge of CLK
-            if clk_last_state == 1 and clk_state == 0:
-                # Determine direction based on DT state
-                if dt_state != clk_state:
-                    # Clockwise - increase volume by step
-                    volume_queue.put(VOLUME_STEP)
-                else:
-                    # Counter-clockwise - decrease volume by step
-                    volume_queue.put(-VOLUME_STEP)
-
-            # Detect button press (falling edge, 200ms debounce)
-            current_time = time.time()
-            if sw_last_state == 1 and sw_state == 0:
-                logger.info(f"DEBUG: Button press detected! sw_last_state={sw_last_state} sw_state={sw_state}")
-                if (current_time - last_sw_press_time) > DEBOUNCE_TIME:
-                    logger.info(f"DEBUG: Button press passed debounce check, calling toggle_mute()")
-                    toggle_mute()
-                    last_sw_press_time = current_time
-                else:
-                    logger.info(f"DEBUG: Button press rejected by debounce (time diff={current_time - last_sw_press_time})")
-
-            clk_last_state = clk_state
-            sw_last_state = sw_state
-
-            time.sleep(0.001)  # 1ms polling for faster edge detection
+            signal.pause()
 
     except KeyboardInterrupt:
         logger.info("Shutting down...")
@@ -283,6 +366,8 @@ def main() -> None:
     worker_thread = threading.Thread(target=volume_worker, daemon=True)
     worker_thread.start()
     logger.info("Volume worker thread started")
+
+    threading.Thread(target=sink_event_listener, daemon=True).start()
     
     try:
         rotary_listener()
@@ -291,6 +376,8 @@ def main() -> None:
     finally:
         running = False
         volume_queue.put(None)  # Signal worker to stop
+        if sink_events_proc is not None:
+            sink_events_proc.terminate()
         worker_thread.join(timeout=1)
 
 
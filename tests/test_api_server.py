@@ -0,0 +1,121 @@
+import asyncio
+
+# pylint: disable=no-name-in-module
+from aioesphomeapi._frame_helper.packets import make_plain_text_packets
+from aioesphomeapi.api_pb2 import (  # type: ignore[attr-defined]
+    DisconnectRequest,
+    DisconnectResponse,
+    PingRequest,
+    PingResponse,
+)
+
+from linux_voice_assistant.api_server import (
+    PROTO_TO_MESSAGE_TYPE,
+    APIServer,
+    encode_message,
+)
+
+
+class FakeTransport:
+    def __init__(self) -> None:
+        self.writes = []
+        self.closed = False
+
+    def writelines(self, data) -> None:
+        self.writes.append(b"".join(data))
+
+    def close(self) -> None:
+        self.closed = True
+
+
+class EchoServer(APIServer):
+    def handle_message(self, msg):
+        return ()
+
+
+def _frames(*packets) -> bytes:
+    return b"".join(make_plain_text_packets(list(packets)))
+
+
+async def _connect():
+    server = EchoServer("test")
+    transport = FakeTransport()
+    server.connection_made(transport)
+    return server, transport
+
+
+def test_sends_coalesce_into_one_write():
+    async def run():
+        server, transport = await _connect()
+        first = encode_message(PingResponse())
+        second = encode_message(DisconnectResponse())
+
+        server.send_encoded(first)
+        server.send_messages([DisconnectResponse()])
+        assert transport.writes == []
+
+        await asyncio.sleep(0)
+        assert transport.writes == [_frames(first, second)]
+
+        # Nothing left over for the next iteration
+        await asyncio.sleep(0)
+        assert len(transport.writes) == 1
+
+    asyncio.run(run())
+
+
+def test_send_from_other_thread():
+    async def run():
+        server, transport = await _connect()
+        packet = encode_message(PingResponse())
+
+        await asyncio.to_thread(server.send_encoded, packet)
+        await asyncio.sleep(0)
+        assert transport.writes == [_frames(packet)]
+
+    asyncio.run(run())
+
+
+def test_empty_send_does_not_write():
+    async def run():
+        server, transport = await _connect()
+        server.send_messages([])
+        await asyncio.sleep(0)
+        assert transport.writes == []
+
+    asyncio.run(run())
+
+
+def test_ping_response():
+    async def run():
+        server, transport = await _connect()
+        server.process_packet(PROTO_TO_MESSAGE_TYPE[PingRequest], b"")
+        await asyncio.sleep(0)
+        assert transport.writes == [_frames(encode_message(PingResponse()))]
+
+    asyncio.run(run())
+
+
+def test_disconnect_flushes_before_close():
+    async def run():
+        server, transport = await _connect()
+        pending = encode_message(PingResponse())
+        server.send_encoded(pending)
+
+        server.process_packet(PROTO_TO_MESSAGE_TYPE[DisconnectRequest], b"")
+
+        # Written synchronously, before the transport is closed
+        assert transport.writes == [
+            _frames(pending, encode_message(DisconnectResponse()))
+        ]
+        assert transport.closed
+
+        # The already scheduled flush has nothing left to write
+        await asyncio.sleep(0)
+        assert len(transport.writes) == 1
+
+        server.send_encoded(pending)
+        await asyncio.sleep(0)
+        assert len(transport.writes) == 1
+
+    asyncio.run(run())
@@ -0,0 +1,102 @@
+# pylint: disable=no-name-in-module
+from aioesphomeapi.api_pb2 import (  # type: ignore[attr-defined]
+    ButtonCommandRequest,
+    ListEntitiesButtonResponse,
+    ListEntitiesRequest,
+    ListEntitiesSwitchResponse,
+    ListEntitiesTextSensorResponse,
+    SubscribeHomeAssistantStatesRequest,
+    SwitchCommandRequest,
+    SwitchStateResponse,
+    TextSensorStateResponse,
+)
+
+from linux_voice_assistant.api_server import encode_message
+from linux_voice_assistant.entity import (
+    ButtonEntity,
+    SwitchEntity,
+    TextAttributeEntity,
+)
+
+
+def test_text_attribute_handlers():
+    entity = TextAttributeEntity(None, key=3, name="Text", object_id="text")
+
+    assert set(entity.message_types) == {
+        ListEntitiesRequest,
+        SubscribeHomeAssistantStatesRequest,
+    }
+    assert list(entity.handle_message(ListEntitiesRequest())) == [
+        encode_message(
+            ListEntitiesTextSensorResponse(object_id="text", key=3, name="Text")
+        )
+    ]
+
+    entity.set_silent("hello")
+    assert list(entity.handle_message(SubscribeHomeAssistantStatesRequest())) == [
+        encode_message(
+            TextSensorStateResponse(key=3, state="hello", missing_state=False)
+        )
+    ]
+
+
+def test_unhandled_message_type():
+    entity = TextAttributeEntity(None, key=3, name="Text", object_id="text")
+
+    assert list(entity.handle_message(SwitchCommandRequest(key=3))) == []
+
+
+def test_switch_command():
+    changes = []
+    entity = SwitchEntity(
+        None, key=5, name="Mute", object_id="mute", on_change=changes.append
+    )
+
+    assert list(entity.handle_message(SwitchCommandRequest(key=5, state=True))) == [
+        encode_message(SwitchStateResponse(key=5, state=True))
+    ]
+    assert entity.state
+    assert changes == [True]
+
+    # Commands for other entities are ignored
+    assert list(entity.handle_message(SwitchCommandRequest(key=6, state=False))) == []
+    assert entity.state
+    assert changes == [True]
+
+
+def test_switch_list_entities():
+    entity = SwitchEntity(None, key=5, name="Mute", object_id="mute")
+
+    (response,) = entity.handle_message(ListEntitiesRequest())
+    assert response == encode_message(
+        ListEntitiesSwitchResponse(
+            object_id="mute", key=5, name="Mute", icon="mdi:microphone-off"
+        )
+    )
+
+
+def test_button_handlers():
+    presses = []
+    entity = ButtonEntity(
+        None,
+        key=7,
+        name="Push",
+        object_id="push",
+        on_press=lambda: presses.append(True),
+    )
+
+    assert list(entity.handle_message(ButtonCommandRequest(key=7))) == []
+    assert presses == [True]
+
+    assert list(entity.handle_message(ButtonCommandRequest(key=8))) == []
+    assert presses == [True]
+
+    # Buttons have no state to report
+    assert list(entity.handle_message(SubscribeHomeAssistantStatesRequest())) == []
+    assert list(entity.handle_message(ListEntitiesRequest())) == [
+        encode_message(
+            ListEntitiesButtonResponse(
+                object_id="push", key=7, name="Push", icon="mdi:microphone"
+            )
+        )
+    ]
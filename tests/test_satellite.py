@@ -0,0 +1,120 @@
+import asyncio
+from types import SimpleNamespace
+
+# pylint: disable=no-name-in-module
+from aioesphomeapi.api_pb2 import (  # type: ignore[attr-defined]
+    VoiceAssistantEventData,
+)
+
+from linux_voice_assistant.models import Preferences
+from linux_voice_assistant.satellite import (
+    _MAX_ACTIVE_WAKE_WORDS,
+    _TAIL_BLOCK_SIZE,
+    VoiceSatelliteProtocol,
+    _EventData,
+    _read_tail,
+)
+
+
+def test_read_tail_empty_file(tmp_path):
+    path = tmp_path / "log"
+    path.write_bytes(b"")
+
+    assert _read_tail(path, 3) == []
+
+
+def test_read_tail_short_file(tmp_path):
+    path = tmp_path / "log"
+    path.write_bytes(b"one\ntwo\n")
+
+    assert _read_tail(path, 5) == [b"one\n", b"two\n"]
+
+
+def test_read_tail_no_trailing_newline(tmp_path):
+    path = tmp_path / "log"
+    path.write_bytes(b"one\ntwo\nthree")
+
+    assert _read_tail(path, 2) == [b"two\n", b"three"]
+
+
+def test_read_tail_across_blocks(tmp_path):
+    # Lines of varying length so they straddle block boundaries
+    lines = [f"{i:05d} {'x' * (i * 37 % 701)}\n".encode() for i in range(200)]
+    path = tmp_path / "log"
+    path.write_bytes(b"".join(lines))
+    assert path.stat().st_size > 3 * _TAIL_BLOCK_SIZE
+
+    for num_lines in (1, 10, 50, 200, 500):
+        assert _read_tail(path, num_lines) == lines[-num_lines:]
+
+
+def test_read_tail_long_line_at_block_boundary(tmp_path):
+    long_line = b"y" * (_TAIL_BLOCK_SIZE + 10) + b"\n"
+    path = tmp_path / "log"
+    path.write_bytes(b"first\n" + long_line + b"last\n")
+
+    assert _read_tail(path, 2) == [long_line, b"last\n"]
+
+
+def test_event_data():
+    data = _EventData(
+        [
+            VoiceAssistantEventData(name="text", value="hello"),
+            VoiceAssistantEventData(name="url", value="http://tts"),
+        ]
+    )
+
+    assert data.get("url") == "http://tts"
+    assert data.get("text", "") == "hello"
+    assert data.get("missing") is None
+    assert data.get("missing", "default") == "default"
+
+
+def test_event_data_empty():
+    assert _EventData([]).get("text", "") == ""
+
+
+def _make_wake_word_satellite(wake_word_ids):
+    state = SimpleNamespace(
+        wake_words={wake_word_id: object() for wake_word_id in wake_word_ids},
+        active_wake_words=set(),
+        preferences=Preferences(),
+        wake_words_changed=False,
+        saved=0,
+    )
+
+    def save_preferences():
+        state.saved += 1
+
+    async def resolve_wake_word(wake_word_id):
+        return None
+
+    state.save_preferences = save_preferences
+    return SimpleNamespace(state=state, _resolve_wake_word=resolve_wake_word)
+
+
+def test_set_active_wake_words_capped():
+    wake_word_ids = [f"ww{i}" for i in range(_MAX_ACTIVE_WAKE_WORDS + 2)]
+    satellite = _make_wake_word_satellite(wake_word_ids)
+
+    asyncio.run(
+        VoiceSatelliteProtocol._set_active_wake_words(satellite, wake_word_ids)
+    )
+
+    expected = set(wake_word_ids[:_MAX_ACTIVE_WAKE_WORDS])
+    assert satellite.state.active_wake_words == expected
+    assert set(satellite.state.preferences.active_wake_words) == expected
+    assert satellite.state.wake_words_changed
+    assert satellite.state.saved == 1
+
+
+def test_set_active_wake_words_skips_unknown():
+    satellite = _make_wake_word_satellite(["ww0"])
+
+    asyncio.run(
+        VoiceSatelliteProtocol._set_active_wake_words(
+            satellite, ["unknown", "ww0"]
+        )
+    )
+
+    assert satellite.state.active_wake_words == {"ww0"}